@@ -0,0 +1,79 @@
+"""Summarize a JSONL file of tickets into a JSONL file of results.
+
+Usage: python -m app.batch tickets.jsonl results.jsonl [--concurrency N]
+
+Re-running with the same input and output files resumes: lines already
+summarized successfully are skipped and new results are appended. Each result's
+"index" is its 0-based line number in the input file.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import AsyncIterator, Iterator, Set, Tuple
+
+from app.services.batch import run_batch, to_ndjson
+from app.services.clients import get_client_registry
+
+
+def _completed(output_path: str) -> Set[int]:
+    """Input line indexes that already have a successful result."""
+    done: Set[int] = set()
+    try:
+        with open(output_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partial last line from an interrupted run.
+                if record.get("status") == "ok" and isinstance(record.get("index"), int):
+                    done.add(record["index"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _lines(input_path: str) -> Iterator[Tuple[int, str]]:
+    with open(input_path, encoding="utf-8") as fh:
+        for index, line in enumerate(fh):
+            if line.strip():
+                yield index, line
+
+
+async def _run(args: argparse.Namespace) -> int:
+    done = _completed(args.output)
+    skipped = 0
+    failed = 0
+
+    async def pending() -> AsyncIterator[Tuple[int, str]]:
+        # Keyed by line rather than ticket number: a later version of a ticket in the same file still runs.
+        nonlocal skipped
+        for index, line in _lines(args.input):
+            if index in done:
+                skipped += 1
+                continue
+            yield index, line
+
+    try:
+        with open(args.output, "a", encoding="utf-8") as out:
+            async for record in run_batch(pending(), args.concurrency):
+                out.write(to_ndjson(record))
+                out.flush()
+                if record["status"] != "ok":
+                    failed += 1
+    finally:
+        await get_client_registry().aclose()
+    print(f"skipped {skipped} already summarized, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Batch-summarize tickets from a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one ticket object per line")
+    parser.add_argument("output", help="JSONL file to append results to (also used to resume)")
+    parser.add_argument("--concurrency", type=int, default=None, help="defaults to BATCH_CONCURRENCY")
+    return asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,15 +8,85 @@ class Settings:
     """Runtime settings loaded from environment variables."""
     openai_api_key: str = os.environ.get("OPENAI_API_KEY", "")
     openai_model: str = os.environ.get("OPENAI_MODEL", "gpt-4.1")
+    # Empty uses the SDK default; point at a local stand-in for benchmarks.
+    openai_base_url: str = os.environ.get("OPENAI_BASE_URL", "")
     request_timeout_seconds: float = float(os.environ.get("REQUEST_TIMEOUT_SECONDS", "15"))
     health_deep_timeout_seconds: float = float(os.environ.get("HEALTH_DEEP_TIMEOUT_SECONDS", "1"))
+    # How long a deep check result is reused, so frequent probes never stack up provider calls.
+    health_deep_cache_seconds: float = float(os.environ.get("HEALTH_DEEP_CACHE_SECONDS", "30"))
+    # Pre-open provider connections on startup; readiness waits for the first successful warm-up.
+    warmup_enabled: bool = os.environ.get("WARMUP_ENABLED", "1") not in ("0", "false", "False")
+    # Warm-up probes pay for cold DNS + TLS, so they get longer than the deep check.
+    warmup_timeout_seconds: float = float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "10"))
     # LLM provider selection: "openai" or "openrouter".
     llm_provider: str = os.environ.get("LLM_PROVIDER", "openai")
     # OpenRouter configuration.
     openrouter_api_key: str = os.environ.get("OPENROUTER_API_KEY", "")
     openrouter_model: str = os.environ.get("OPENROUTER_MODEL", "tngtech/deepseek-r1t2-chimera:free")
+    openrouter_base_url: str = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
     openrouter_site_url: str = os.environ.get("OPENROUTER_SITE_URL", "")
     openrouter_site_name: str = os.environ.get("OPENROUTER_SITE_NAME", "")
+    # Extra providers to fail over / hedge to after LLM_PROVIDER, e.g. "openrouter".
+    llm_providers: str = os.environ.get("LLM_PROVIDERS", "")
+    llm_max_retries: int = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+    llm_retry_backoff_seconds: float = float(os.environ.get("LLM_RETRY_BACKOFF_SECONDS", "0.25"))
+    # Overall budget for one summary across retries and failover (0 = unbounded).
+    llm_deadline_seconds: float = float(os.environ.get("LLM_DEADLINE_SECONDS", "20"))
+    llm_breaker_failure_threshold: int = int(os.environ.get("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    llm_breaker_cooldown_seconds: float = float(os.environ.get("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+    # Hedging fires the next provider when the current one exceeds its p95 latency.
+    llm_hedge_enabled: bool = os.environ.get("LLM_HEDGE_ENABLED", "0") not in ("0", "false", "False")
+    llm_hedge_default_delay_seconds: float = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "4"))
+    llm_hedge_min_delay_seconds: float = float(os.environ.get("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+    # HTTP connection pool limits for pooled LLM clients.
+    llm_max_connections: int = int(os.environ.get("LLM_MAX_CONNECTIONS", "100"))
+    llm_max_keepalive_connections: int = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    llm_keepalive_expiry_seconds: float = float(os.environ.get("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    # Async LLM concurrency: max in-flight calls per provider (0 = LLM_MAX_CONNECTIONS, never above it)
+    # and how long to wait for a slot.
+    llm_max_concurrency: int = int(os.environ.get("LLM_MAX_CONCURRENCY", "0"))
+    llm_acquire_timeout_seconds: float = float(os.environ.get("LLM_ACQUIRE_TIMEOUT_SECONDS", "0"))
+    llm_busy_retry_after_seconds: float = float(os.environ.get("LLM_BUSY_RETRY_AFTER_SECONDS", "1"))
+    # Summary cache: "memory" or "sqlite" (persistent, shared across workers).
+    summary_cache_enabled: bool = os.environ.get("SUMMARY_CACHE_ENABLED", "1") not in ("0", "false", "False")
+    summary_cache_backend: str = os.environ.get("SUMMARY_CACHE_BACKEND", "memory")
+    summary_cache_path: str = os.environ.get("SUMMARY_CACHE_PATH", "summary_cache.sqlite3")
+    summary_cache_ttl_seconds: float = float(os.environ.get("SUMMARY_CACHE_TTL_SECONDS", "86400"))
+    summary_cache_max_entries: int = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+    # Ask providers for JSON-schema output instead of parsing headings; streaming stays plain text.
+    structured_output_enabled: bool = os.environ.get("STRUCTURED_OUTPUT_ENABLED", "0") not in ("0", "false", "False")
+    structured_output_max_reasks: int = int(os.environ.get("STRUCTURED_OUTPUT_MAX_REASKS", "1"))
+    # Prompt compaction: estimated input-token budget and per-comment character cap.
+    prompt_token_budget: int = int(os.environ.get("PROMPT_TOKEN_BUDGET", "6000"))
+    prompt_max_comment_chars: int = int(os.environ.get("PROMPT_MAX_COMMENT_CHARS", "2000"))
+    # Webhook mode: "sync" answers with the summary, "queue" returns 202 and summarizes in background workers.
+    webhook_mode: str = os.environ.get("WEBHOOK_MODE", "sync")
+    job_workers: int = int(os.environ.get("JOB_WORKERS", "4"))
+    job_queue_path: str = os.environ.get("JOB_QUEUE_PATH", "jobs.sqlite3")
+    job_poll_interval_seconds: float = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "1"))
+    # A running job whose worker has not finished within the lease is handed to another worker.
+    job_lease_seconds: float = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+    job_callback_url: str = os.environ.get("JOB_CALLBACK_URL", "")
+    # URL prefixes a caller may pass as ?callback_url=...; empty allows only JOB_CALLBACK_URL.
+    job_callback_allowed_urls: str = os.environ.get("JOB_CALLBACK_ALLOWED_URLS", "")
+    job_callback_timeout_seconds: float = float(os.environ.get("JOB_CALLBACK_TIMEOUT_SECONDS", "5"))
+    # Batch summarization: parallel items and per-provider rate limits (0 disables a limit).
+    batch_concurrency: int = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+    batch_requests_per_minute: float = float(os.environ.get("BATCH_REQUESTS_PER_MINUTE", "0"))
+    batch_tokens_per_minute: float = float(os.environ.get("BATCH_TOKENS_PER_MINUTE", "0"))
+    # Priority scheduler in front of LLM calls: max admitted calls (0 = the LLM concurrency limit)
+    # and tokens/min budgets, all per process.
+    scheduler_max_concurrency: int = int(os.environ.get("SCHEDULER_MAX_CONCURRENCY", "0"))
+    scheduler_provider_tokens_per_minute: float = float(os.environ.get("SCHEDULER_PROVIDER_TOKENS_PER_MINUTE", "0"))
+    # Default budget for every ticket label, plus "label=tokens_per_minute,..." overrides.
+    scheduler_label_tokens_per_minute: float = float(os.environ.get("SCHEDULER_LABEL_TOKENS_PER_MINUTE", "0"))
+    scheduler_label_limits: str = os.environ.get("SCHEDULER_LABEL_LIMITS", "")
+    # Priorities rejected outright when their budget is exhausted; others wait up to the max wait (0 = forever).
+    scheduler_shed_priorities: str = os.environ.get("SCHEDULER_SHED_PRIORITIES", "normal")
+    # Kept below the upstream webhook timeout of a few seconds.
+    scheduler_max_wait_seconds: float = float(os.environ.get("SCHEDULER_MAX_WAIT_SECONDS", "5"))
+    # Re-summarize tickets that only gained comments from the previous summary plus the new comments.
+    incremental_summary_enabled: bool = os.environ.get("INCREMENTAL_SUMMARY_ENABLED", "1") not in ("0", "false", "False")
 
 
 _settings: Optional[Settings] = None
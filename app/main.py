@@ -1,23 +1,88 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Union
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
 from app.config import get_settings
-from app.schemas import SummaryResponse, Ticket
-from app.services.summarizer import summarize_ticket
+from app.schemas import JobAccepted, JobStatus, SummaryResponse, Ticket
+from app.services.batch import ndjson_lines, run_batch, to_ndjson
+from app.services.cache import get_summary_cache
+from app.services.clients import get_client_registry
+from app.services.concurrency import LLMBusyError
+from app.services.health import get_provider_probe
+from app.services.jobs import callback_allowed, get_job_pool, get_job_store
+from app.services.metrics import HTTP_DURATION, HTTP_REQUESTS, REGISTRY, stage, start_timings
+from app.services.pipeline import summarize, summarize_stream
+from app.services.ticket_state import get_ticket_state_store
 
 
 logging.basicConfig(level=logging.INFO)
 _logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Ticket Summarizer Webhook")
+
+def _queue_mode() -> bool:
+    return get_settings().webhook_mode.lower() == "queue"
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Warm providers and start queue workers; release pooled connections and stores on shutdown."""
+    queue_mode = _queue_mode()
+    get_provider_probe().start_warm_up()
+    if queue_mode:
+        get_job_pool().start()
+    yield
+    await get_provider_probe().stop()
+    if queue_mode:
+        await get_job_pool().stop()
+        get_job_store().close()
+    await get_client_registry().aclose()
+    get_summary_cache().close()
+    get_ticket_state_store().close()
+
+
+app = FastAPI(title="Ticket Summarizer Webhook", lifespan=_lifespan)
+
+
+@app.middleware("http")
+async def _observe(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """Record request metrics and emit one structured log line with per-stage timings."""
+    timings = start_timings()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # For streaming responses this measures time to the first byte.
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.inc(method=request.method, path=path, status=str(status_code))
+        HTTP_DURATION.observe(elapsed, method=request.method, path=path)
+        if path != "/metrics":
+            _logger.info(
+                json.dumps(
+                    {
+                        "event": "request",
+                        "method": request.method,
+                        "path": path,
+                        "status": status_code,
+                        "duration_seconds": round(elapsed, 6),
+                        "timings": timings,
+                    }
+                )
+            )
 
 
 @app.get("/healthz")
-def healthz(deep: int = Query(default=0)) -> JSONResponse:
+async def healthz(deep: int = Query(default=0)) -> JSONResponse:
     """Readiness probe endpoint."""
     settings = get_settings()
     checks: Dict[str, Any] = {}
@@ -32,15 +97,19 @@ def healthz(deep: int = Query(default=0)) -> JSONResponse:
         checks["model_configured"] = bool(settings.openai_model)
 
     status = "ok" if all(checks.values()) else "unhealthy"
-    ready = status == "ok"
+    probe = get_provider_probe()
+    # Not ready until provider connections are warm, so rolling deploys do not route cold traffic here.
+    ready = status == "ok" and probe.warm
+    checks["warm_up"] = "ok" if probe.warm else "pending"
 
-    # Optional deep check.
+    # Optional deep check: cached models-list call per provider, bounded by HEALTH_DEEP_TIMEOUT_SECONDS.
     if deep:
-        # Best-effort: try very cheap call shape to validate auth/connectivity.
         try:
-            # We avoid real model calls to keep it light; we just verify key presence here.
-            # If a real deep check is needed, we can add a tiny call in the future.
-            checks["deep_check"] = "skipped"
+            results = await probe.check(settings)
+            checks["deep_check"] = results
+            if results.get(checks["provider"]) != "ok":
+                status = "degraded"
+                ready = False
         except Exception as exc:  # noqa: BLE001
             _logger.warning("Deep check failed: %s", exc)
             checks["deep_check"] = "failed"
@@ -52,12 +121,44 @@ def healthz(deep: int = Query(default=0)) -> JSONResponse:
     return JSONResponse(content=body, status_code=http_code)
 
 
-@app.post("/webhook/ticket", response_model=SummaryResponse)
-def webhook_ticket(ticket: Ticket) -> SummaryResponse:
-    """Receive a ticket payload, summarize via OpenAI, print and return JSON."""
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _busy(ticket: Ticket, exc: LLMBusyError) -> HTTPException:
+    _logger.warning("Rejecting ticket %s: %s", ticket.ticket_number, exc)
+    return HTTPException(
+        status_code=429,
+        detail="Summarization service busy, retry later.",
+        headers={"Retry-After": str(max(1, round(exc.retry_after_seconds)))},
+    )
+
+
+@app.post(
+    "/webhook/ticket",
+    response_model=SummaryResponse,
+    responses={202: {"model": JobAccepted, "description": "Queued (WEBHOOK_MODE=queue)."}},
+)
+async def webhook_ticket(
+    ticket: Ticket, callback_url: Optional[str] = Query(default=None)
+) -> Union[SummaryResponse, JSONResponse]:
+    """Receive a ticket payload, summarize via OpenAI, print and return JSON.
+
+    In queue mode the ticket is only validated and enqueued; the result is served by `GET /jobs/{id}`.
+    """
+    if _queue_mode():
+        settings = get_settings()
+        if callback_url and not callback_allowed(callback_url, settings):
+            raise HTTPException(status_code=400, detail="callback_url is not allowed.")
+        url = callback_url or settings.job_callback_url or None
+        job_id = await asyncio.to_thread(get_job_store().enqueue, ticket, url)
+        get_job_pool().notify()
+        return JSONResponse(status_code=202, content=JobAccepted(job_id=job_id, status="queued").model_dump())
+
     try:
-        ticket_json_str = json.dumps(ticket.model_dump(), ensure_ascii=False, indent=2)
-        problem, resolution_summary, result_and_key_points = summarize_ticket(ticket_json_str)
+        (problem, resolution_summary, result_and_key_points), mode = await summarize(ticket)
+    except LLMBusyError as exc:
+        raise _busy(ticket, exc) from exc
     except Exception as exc:  # noqa: BLE001
         _logger.exception("Summarization failed: %s", exc)
         raise HTTPException(status_code=503, detail="Summarization service unavailable.") from exc
@@ -67,10 +168,94 @@ def webhook_ticket(ticket: Ticket) -> SummaryResponse:
         "روند حل به‌صورت خلاصه:\n" + resolution_summary.strip() + "\n\n"
         "نتیجه و نکات کلیدی:\n" + result_and_key_points.strip()
     )
-    print(combined_for_print)
+    with stage("print"):
+        print(combined_for_print)
 
     return SummaryResponse(
         problem=problem.strip(),
         resolution_summary=resolution_summary.strip(),
         result_and_key_points=result_and_key_points.strip(),
+        summary_mode=mode,
     )
+
+
+@app.post("/webhook/ticket/stream")
+async def webhook_ticket_stream(ticket: Ticket) -> StreamingResponse:
+    """Stream the summary as Server-Sent Events: section-tagged deltas, then the final summary."""
+    events = summarize_stream(ticket)
+    # Pull the first event before committing to a 200 so saturation and early failures map to status codes.
+    try:
+        first = await events.__anext__()
+    except LLMBusyError as exc:
+        raise _busy(ticket, exc) from exc
+    except Exception as exc:  # noqa: BLE001
+        _logger.exception("Summarization failed: %s", exc)
+        raise HTTPException(status_code=503, detail="Summarization service unavailable.") from exc
+
+    async def body() -> AsyncIterator[str]:
+        event: Tuple[str, Dict[str, Any]] = first
+        try:
+            while True:
+                yield _sse(*event)
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            return
+        except Exception as exc:  # noqa: BLE001
+            _logger.exception("Summarization stream failed: %s", exc)
+            yield _sse("error", {"detail": "Summarization service unavailable."})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/tickets/summarize:batch")
+async def summarize_batch(request: Request, concurrency: Optional[int] = Query(default=None, ge=1)) -> StreamingResponse:
+    """Summarize a JSON array or NDJSON stream of tickets, streaming NDJSON results as they complete."""
+    settings = get_settings()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        # The body is read up front: StreamingResponse consumes `receive` to watch for disconnects,
+        # so it cannot be read lazily while results stream out.
+        items: Any = ndjson_lines(await request.body())
+    else:
+        try:
+            payload = await request.json()
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON.") from exc
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON.")
+
+        async def iterate() -> AsyncIterator[Tuple[int, Any]]:
+            for pair in enumerate(payload):
+                yield pair
+
+        items = iterate()
+
+    # Callers may lower the configured parallelism but never raise it.
+    limit = min(concurrency or settings.batch_concurrency, settings.batch_concurrency)
+
+    async def body() -> AsyncIterator[str]:
+        async for record in run_batch(items, limit):
+            yield to_ndjson(record)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str) -> JobStatus:
+    """Status and, once done, the summary of a queued ticket."""
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return JobStatus(**job)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of request, stage, provider, cache and queue metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    """Summary cache hit/miss/eviction counters."""
+    return get_summary_cache().snapshot()
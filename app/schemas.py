@@ -20,7 +20,27 @@ class Ticket(BaseModel):
     comments: List[Comment] = Field(default_factory=list)
 
 
-class SummaryResponse(BaseModel):
+class SummarySections(BaseModel):
     problem: str
     resolution_summary: str
     result_and_key_points: str
+
+
+class SummaryResponse(SummarySections):
+    # "full", "incremental" (prior summary + new comments) or "cached".
+    summary_mode: str = "full"
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    ticket_number: int
+    # "queued", "running", "done", "failed" or "superseded".
+    status: str
+    result: Optional[SummaryResponse] = None
+    error: Optional[str] = None
+    superseded_by: Optional[str] = None
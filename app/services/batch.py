@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.config import Settings, get_settings
+from app.schemas import Ticket
+from app.services.concurrency import LLMBusyError
+from app.services.pipeline import summarize
+from app.services.prompt import estimate_tokens
+from app.services.ratelimit import TokenBucket
+from app.services.summarizer import MAX_OUTPUT_TOKENS, SECTION_FIELDS, provider_and_model
+
+
+_logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class ProviderRateLimits:
+    """Requests/min and tokens/min buckets per provider for batch traffic."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+
+    def _for(self, provider: str, settings: Settings) -> Tuple[TokenBucket, TokenBucket]:
+        buckets = self._buckets.get(provider)
+        if (
+            buckets is None
+            or buckets[0].rate_per_minute != settings.batch_requests_per_minute
+            or buckets[1].rate_per_minute != settings.batch_tokens_per_minute
+        ):
+            buckets = (
+                TokenBucket(settings.batch_requests_per_minute),
+                TokenBucket(settings.batch_tokens_per_minute),
+            )
+            self._buckets[provider] = buckets
+        return buckets
+
+    async def acquire(self, provider: str, tokens: int, settings: Settings) -> None:
+        requests_bucket, tokens_bucket = self._for(provider, settings)
+        await requests_bucket.acquire(1)
+        await tokens_bucket.acquire(tokens)
+
+
+_limits = ProviderRateLimits()
+
+
+def _parse(item: Any) -> Ticket:
+    if isinstance(item, Ticket):
+        return item
+    if isinstance(item, (str, bytes)):
+        return Ticket.model_validate_json(item)
+    return Ticket.model_validate(item)
+
+
+async def _summarize_one(index: int, item: Any) -> Dict[str, Any]:
+    settings = get_settings()
+    try:
+        ticket = _parse(item)
+    except (ValidationError, ValueError) as exc:
+        return {"index": index, "ticket_number": None, "status": "error", "error": f"invalid ticket: {exc}"}
+
+    provider, _model = provider_and_model(settings)
+    charged = False
+
+    async def charge(content: str) -> None:
+        # Charged once per item and only on a cache miss; busy retries reuse the same allowance.
+        nonlocal charged
+        if not charged:
+            charged = True
+            await _limits.acquire(provider, estimate_tokens(content) + MAX_OUTPUT_TOKENS, settings)
+
+    while True:
+        try:
+            sections, mode = await summarize(ticket, before_llm=charge)
+        except LLMBusyError as exc:
+            # The live webhook shares the limiter; backfills yield to it instead of failing.
+            await asyncio.sleep(exc.retry_after_seconds)
+            continue
+        except Exception as exc:  # noqa: BLE001
+            _logger.warning("Batch item %d (ticket %s) failed: %s", index, ticket.ticket_number, exc)
+            return {
+                "index": index,
+                "ticket_number": ticket.ticket_number,
+                "status": "error",
+                "error": str(exc) or type(exc).__name__,
+            }
+        result: Dict[str, Any] = {field: part.strip() for field, part in zip(SECTION_FIELDS, sections)}
+        result["summary_mode"] = mode
+        return {"index": index, "ticket_number": ticket.ticket_number, "status": "ok", "result": result}
+
+
+async def run_batch(
+    items: AsyncIterable[Tuple[int, Any]], concurrency: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Summarize `(index, item)` pairs concurrently, yielding one record per item as it completes.
+
+    The index is echoed in the record so callers can match results to input positions.
+    Items may be `Ticket` objects, dicts or JSON strings; invalid ones yield an error record.
+    """
+    limit = max(1, concurrency or get_settings().batch_concurrency)
+    slots = asyncio.Semaphore(limit)
+    results: "asyncio.Queue[Any]" = asyncio.Queue()
+    tasks: Set["asyncio.Task[None]"] = set()
+
+    async def one(index: int, item: Any) -> None:
+        try:
+            record = await _summarize_one(index, item)
+        finally:
+            slots.release()
+        await results.put(record)
+
+    async def feed() -> None:
+        try:
+            async for index, item in items:
+                await slots.acquire()
+                task = asyncio.create_task(one(index, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await results.put(_DONE)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            record = await results.get()
+            if record is _DONE:
+                break
+            yield record
+        # Surface input errors (e.g. a broken request stream).
+        await feeder
+    finally:
+        feeder.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+
+async def ndjson_lines(body: bytes) -> AsyncIterator[Tuple[int, str]]:
+    """Yield `(line index, line)` for the non-empty lines of an NDJSON body."""
+    for index, line in enumerate(body.splitlines()):
+        if line.strip():
+            yield index, line.decode("utf-8")
+
+
+def to_ndjson(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import Settings, get_settings
+from app.schemas import Ticket
+from app.services.metrics import register_callback
+
+
+_logger = logging.getLogger(__name__)
+
+Sections = Tuple[str, str, str]
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared computation whose leader was cancelled, so a waiter takes over."""
+
+
+@dataclass
+class CacheStats:
+    """Counters exposed for observability."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    coalesced: int = 0
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def summary_cache_key(ticket: Ticket, provider: str, model: str, prompt_version: str) -> str:
+    """Content hash of the normalized ticket plus everything that shapes the output."""
+    payload = json.dumps(
+        {
+            "ticket": _normalize(ticket.model_dump()),
+            "provider": provider,
+            "model": model,
+            "prompt_version": prompt_version,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRU:
+    """In-process LRU bounded by entry count, with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, stats: CacheStats) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Sections]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Sections]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self._stats.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Sections) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+
+class SQLiteStore:
+    """Persistent store shared by every worker pointing at the same file."""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, stats: CacheStats) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summary_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summary_cache_accessed ON summary_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[Sections]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM summary_cache WHERE key = ?", (key,))
+                self._stats.evictions += 1
+                return None
+            self._conn.execute("UPDATE summary_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        problem, resolution, result = json.loads(row[0])
+        return problem, resolution, result
+
+    def set(self, key: str, value: Sections) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(list(value), ensure_ascii=False), now + self._ttl, now),
+            )
+            cur = self._conn.execute(
+                "DELETE FROM summary_cache WHERE expires_at < ? OR key IN ("
+                " SELECT key FROM summary_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (now, self._max_entries),
+            )
+            self._stats.evictions += max(cur.rowcount, 0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SummaryCache:
+    """Memory LRU in front of an optional SQLite store, with single-flight computation."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.stats = CacheStats()
+        self._memory = MemoryLRU(settings.summary_cache_max_entries, settings.summary_cache_ttl_seconds, self.stats)
+        self._store: Optional[SQLiteStore] = None
+        if settings.summary_cache_backend.lower() == "sqlite":
+            self._store = SQLiteStore(
+                settings.summary_cache_path,
+                settings.summary_cache_max_entries,
+                settings.summary_cache_ttl_seconds,
+                self.stats,
+            )
+        self._in_flight: Dict[str, "asyncio.Future[Sections]"] = {}
+
+    async def _lookup(self, key: str) -> Optional[Sections]:
+        value = self._memory.get(key)
+        if value is None and self._store is not None:
+            value = await asyncio.to_thread(self._store.get, key)
+            if value is not None:
+                self._memory.set(key, value)
+        return value
+
+    async def _save(self, key: str, value: Sections) -> None:
+        self._memory.set(key, value)
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.set, key, value)
+            except sqlite3.Error as exc:
+                _logger.warning("Summary cache write failed: %s", exc)
+
+    async def get(self, key: str) -> Optional[Sections]:
+        """Return cached sections for key, counting the lookup as a hit or miss."""
+        value = await self._lookup(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def put(self, key: str, value: Sections) -> None:
+        """Store sections computed outside `get_or_compute`, skipping empty output."""
+        if any(part.strip() for part in value):
+            await self._save(key, value)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Sections]]) -> Sections:
+        """Return the cached sections for key, computing them at most once concurrently."""
+        value = await self._lookup(key)
+        if value is not None:
+            self.stats.hits += 1
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                # The leader's caller went away; the first waiter to get here recomputes for the rest.
+                return await self.get_or_compute(key, compute)
+
+        self.stats.misses += 1
+        future: "asyncio.Future[Sections]" = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unobserved failure does not log "exception never retrieved".
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Empty output usually means a model hiccup; do not pin it.
+            await self.put(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus current size, for the stats endpoint."""
+        return {**asdict(self.stats), "size": len(self._memory), "in_flight": len(self._in_flight)}
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+
+
+_cache: Optional[SummaryCache] = None
+
+
+def _cache_counter(field: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    def collect() -> Dict[Tuple[str, ...], float]:
+        return {(): float(getattr(_cache.stats, field))} if _cache is not None else {}
+    return collect
+
+
+for _field in ("hits", "misses", "evictions", "coalesced"):
+    register_callback(
+        f"summary_cache_{_field}_total", f"Summary cache {_field}.", _cache_counter(_field), type_name="counter"
+    )
+register_callback(
+    "summary_cache_entries",
+    "Entries in the in-memory summary cache.",
+    lambda: {(): float(len(_cache._memory))} if _cache is not None else {},
+)
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the process-wide summary cache."""
+    global _cache
+    if _cache is None:
+        _cache = SummaryCache(get_settings())
+    return _cache
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional, Set
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import Settings, get_settings
+
+
+_logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+class ClientKey(NamedTuple):
+    """Identity of a pooled client; any change produces a fresh client."""
+    provider: str
+    base_url: Optional[str]
+    api_key: str
+    timeout: float
+
+
+def client_key(provider: str, settings: Settings) -> ClientKey:
+    """Build the registry key for a provider from the current settings."""
+    if provider == "openrouter":
+        return ClientKey(
+            provider,
+            settings.openrouter_base_url or OPENROUTER_BASE_URL,
+            settings.openrouter_api_key,
+            settings.request_timeout_seconds,
+        )
+    return ClientKey("openai", settings.openai_base_url or None, settings.openai_api_key, settings.request_timeout_seconds)
+
+
+def _limits(settings: Settings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+    )
+
+
+class ClientRegistry:
+    """Process-wide cache of provider clients sharing one HTTP connection pool each."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._async_clients: Dict[ClientKey, AsyncOpenAI] = {}
+        self._closing: Set["asyncio.Task[None]"] = set()
+
+    def get_async(self, provider: str, settings: Optional[Settings] = None) -> AsyncOpenAI:
+        """Return the pooled async client for a provider, building it on first use."""
+        settings = settings or get_settings()
+        key = client_key(provider, settings)
+        client = self._async_clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._async_clients.get(key)
+            if client is not None:
+                return client
+            # Settings changed for this provider: retire the old client.
+            for stale in [k for k in self._async_clients if k.provider == key.provider]:
+                self._schedule_aclose(self._async_clients.pop(stale))
+            http_client = httpx.AsyncClient(limits=_limits(settings), timeout=key.timeout)
+            # Retries are owned by the router so they can fail over instead of stacking timeouts.
+            client = AsyncOpenAI(
+                api_key=key.api_key,
+                base_url=key.base_url,
+                timeout=key.timeout,
+                max_retries=0,
+                http_client=http_client,
+            )
+            self._async_clients[key] = client
+            _logger.info("Created pooled async LLM client for provider=%s", key.provider)
+            return client
+
+    async def aclose(self) -> None:
+        """Close every pooled client and drop it from the registry."""
+        with self._lock:
+            clients = list(self._async_clients.values())
+            self._async_clients.clear()
+        for client in clients:
+            await self._aclose_one(client)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _schedule_aclose(self, client: AsyncOpenAI) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._aclose_one(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_one(client: AsyncOpenAI) -> None:
+        try:
+            await client.close()
+        except Exception as exc:  # noqa: BLE001
+            _logger.warning("Failed to close async LLM client: %s", exc)
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """Return the process-wide client registry."""
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry()
+    return _registry
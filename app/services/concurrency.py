@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from app.config import Settings, get_settings
+from app.services.metrics import REGISTRY, Counter, register_callback
+
+
+_logger = logging.getLogger(__name__)
+
+_BUSY_REJECTIONS = REGISTRY.register(
+    Counter("llm_busy_rejections_total", "Calls rejected because the concurrency limit was saturated.", ("provider",))
+)
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when a provider's concurrency limit is saturated."""
+
+    def __init__(self, provider: str, retry_after_seconds: float) -> None:
+        super().__init__(f"Too many in-flight LLM calls for provider {provider!r}.")
+        self.provider = provider
+        self.retry_after_seconds = retry_after_seconds
+
+
+def effective_limit(settings: Settings) -> int:
+    """In-flight calls allowed per provider: LLM_MAX_CONCURRENCY, never above the connection pool."""
+    # Calls beyond the pool would only queue inside httpx and hit PoolTimeout instead of a fast 429.
+    pool = settings.llm_max_connections
+    return min(settings.llm_max_concurrency or pool, pool)
+
+
+class ConcurrencyLimiter:
+    """Per-provider semaphores bounding in-flight async LLM calls."""
+
+    def __init__(self) -> None:
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._limits: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _semaphore(self, provider: str, limit: int) -> asyncio.Semaphore:
+        # A changed limit only applies to new semaphores; in-flight holders finish on the old one.
+        if self._limits.get(provider) != limit:
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+            self._limits[provider] = limit
+        return self._semaphores[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str, settings: Optional[Settings] = None) -> AsyncIterator[None]:
+        """Hold one concurrency slot, or raise `LLMBusyError` if none frees up in time."""
+        settings = settings or get_settings()
+        semaphore = self._semaphore(provider, effective_limit(settings))
+        wait = settings.llm_acquire_timeout_seconds
+
+        if semaphore.locked() and wait <= 0:
+            _BUSY_REJECTIONS.inc(provider=provider)
+            raise LLMBusyError(provider, settings.llm_busy_retry_after_seconds)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=wait if wait > 0 else None)
+        except asyncio.TimeoutError as exc:
+            _logger.warning("Concurrency limit reached for provider=%s", provider)
+            _BUSY_REJECTIONS.inc(provider=provider)
+            raise LLMBusyError(provider, settings.llm_busy_retry_after_seconds) from exc
+
+        self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[provider] -= 1
+            semaphore.release()
+
+
+_limiter: Optional[ConcurrencyLimiter] = None
+
+
+def _in_flight() -> Dict[Tuple[str, ...], float]:
+    if _limiter is None:
+        return {}
+    return {(p,): float(n) for p, n in _limiter._in_flight.items()}
+
+
+register_callback("llm_in_flight", "LLM calls currently holding a concurrency slot.", _in_flight, ("provider",))
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    """Return the process-wide concurrency limiter."""
+    global _limiter
+    if _limiter is None:
+        _limiter = ConcurrencyLimiter()
+    return _limiter
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from app.config import Settings, get_settings
+from app.services.clients import get_client_registry
+from app.services.summarizer import configured_providers
+
+
+_logger = logging.getLogger(__name__)
+
+_WARMUP_MAX_BACKOFF_SECONDS = 30.0
+
+
+class ProviderProbe:
+    """Startup warm-up and cached connectivity checks against the providers' models endpoint."""
+
+    def __init__(self) -> None:
+        self.warm = False
+        self._lock = asyncio.Lock()
+        self._result: Optional[Dict[str, str]] = None
+        self._checked_at = 0.0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def _probe(self, provider: str, settings: Settings, timeout: float) -> str:
+        client = get_client_registry().get_async(provider, settings)
+        try:
+            # Cheap authenticated GET; also opens the pooled connection (DNS + TLS).
+            await asyncio.wait_for(client.models.list(), timeout=timeout)
+        except Exception as exc:  # noqa: BLE001
+            return f"failed: {type(exc).__name__}"
+        return "ok"
+
+    async def _probe_all(self, settings: Settings, timeout: float) -> Dict[str, str]:
+        providers = configured_providers(settings)
+        results = await asyncio.gather(*(self._probe(p, settings, timeout) for p in providers))
+        return dict(zip(providers, results))
+
+    async def check(self, settings: Optional[Settings] = None) -> Dict[str, str]:
+        """Per-provider result, reusing the last one while fresh so probes never stack up calls."""
+        settings = settings or get_settings()
+        if self._result is not None and time.monotonic() - self._checked_at < settings.health_deep_cache_seconds:
+            return self._result
+        async with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= settings.health_deep_cache_seconds:
+                self._result = await self._probe_all(settings, settings.health_deep_timeout_seconds)
+                self._checked_at = time.monotonic()
+        return self._result
+
+    async def _warm_up(self, settings: Settings) -> None:
+        delay = 1.0
+        while True:
+            # Probe directly: a cached cold-start failure would hold readiness back for the whole cache window.
+            result = await self._probe_all(settings, settings.warmup_timeout_seconds)
+            if any(status == "ok" for status in result.values()):
+                self._result = result
+                self._checked_at = time.monotonic()
+                self.warm = True
+                _logger.info("Provider warm-up complete: %s", result)
+                return
+            _logger.warning("Provider warm-up failed (%s); retrying in %.0fs", result or "no providers", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _WARMUP_MAX_BACKOFF_SECONDS)
+
+    def start_warm_up(self, settings: Optional[Settings] = None) -> None:
+        """Warm provider connections in the background; readiness waits for the first success."""
+        settings = settings or get_settings()
+        if not settings.warmup_enabled:
+            self.warm = True
+            return
+        self._task = asyncio.create_task(self._warm_up(settings), name="provider-warm-up")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+_probe: Optional[ProviderProbe] = None
+
+
+def get_provider_probe() -> ProviderProbe:
+    """Return the process-wide provider probe."""
+    global _probe
+    if _probe is None:
+        _probe = ProviderProbe()
+    return _probe
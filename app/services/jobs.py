@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import Settings, get_settings
+from app.schemas import Ticket
+from app.services.metrics import register_callback, start_timings
+from app.services.concurrency import LLMBusyError
+from app.services.pipeline import summarize
+from app.services.scheduler import ticket_rank
+from app.services.summarizer import SECTION_FIELDS
+
+
+_logger = logging.getLogger(__name__)
+
+# Job states. "superseded" jobs were replaced by a newer delivery of the same ticket before running.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+
+
+class JobStore:
+    """Durable SQLite job table shared by every worker process using the same file."""
+
+    def __init__(self, path: str, lease_seconds: float) -> None:
+        self._lease = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, ticket_number INTEGER NOT NULL, payload TEXT NOT NULL,"
+            " callback_url TEXT, status TEXT NOT NULL, result TEXT, error TEXT,"
+            " superseded_by TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL, claimed_at REAL,"
+            " priority INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "priority" not in columns:
+            # Queue files from before priority scheduling.
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_priority ON jobs (status, priority, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ticket ON jobs (ticket_number, status)")
+
+    def enqueue(self, ticket: Ticket, callback_url: Optional[str]) -> str:
+        """Queue a ticket, superseding queued jobs for the same ticket number."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, superseded_by = ?, updated_at = ?"
+                    " WHERE ticket_number = ? AND status = ?",
+                    (SUPERSEDED, job_id, now, ticket.ticket_number, QUEUED),
+                )
+                self._conn.execute(
+                    "INSERT INTO jobs"
+                    " (id, ticket_number, payload, callback_url, status, priority, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        ticket.ticket_number,
+                        ticket.model_dump_json(),
+                        callback_url,
+                        QUEUED,
+                        ticket_rank(ticket),
+                        now,
+                        now,
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """Atomically take the highest-priority runnable queued job, or one whose worker's lease expired."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # One running job per ticket, so queued updates wait and can still be superseded.
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE (status = ? AND ticket_number NOT IN ("
+                    "  SELECT ticket_number FROM jobs WHERE status = ? AND claimed_at >= ?))"
+                    " OR (status = ? AND claimed_at < ?)"
+                    " ORDER BY priority, created_at LIMIT 1",
+                    (QUEUED, RUNNING, now - self._lease, RUNNING, now - self._lease),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, claimed_at = ?, updated_at = ?, attempts = attempts + 1"
+                        " WHERE id = ?",
+                        (RUNNING, now, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def requeue(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, claimed_at = NULL, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, RUNNING),
+            )
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result else None, error, time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "ticket_number": row["ticket_number"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "superseded_by": row["superseded_by"],
+        }
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """Background asyncio workers draining the job store."""
+
+    def __init__(self, store: JobStore, settings: Settings) -> None:
+        self._store = store
+        self._settings = settings
+        self._wakeup = asyncio.Event()
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def start(self) -> None:
+        self._http = httpx.AsyncClient(timeout=self._settings.job_callback_timeout_seconds)
+        self._tasks = [
+            asyncio.create_task(self._run(index), name=f"job-worker-{index}")
+            for index in range(self._settings.job_workers)
+        ]
+        _logger.info("Started %d job worker(s)", len(self._tasks))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._http is not None:
+            await self._http.aclose()
+
+    def notify(self) -> None:
+        """Wake idle workers after an enqueue in this process."""
+        self._wakeup.set()
+
+    async def _run(self, index: int) -> None:
+        while True:
+            try:
+                row = await asyncio.to_thread(self._store.claim)
+                if row is None:
+                    # Other processes enqueue too, so fall back to polling between local wake-ups.
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), timeout=self._settings.job_poll_interval_seconds
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self._process(row)
+            except Exception as exc:  # noqa: BLE001
+                # E.g. "database is locked" under multi-process contention; a dead worker is never restarted.
+                _logger.exception("Job worker %d error: %s", index, exc)
+                await asyncio.sleep(self._settings.job_poll_interval_seconds)
+
+    async def _process(self, row: sqlite3.Row) -> None:
+        job_id = row["id"]
+        timings = start_timings()
+        try:
+            ticket = Ticket.model_validate_json(row["payload"])
+            sections, mode = await summarize(ticket)
+        except asyncio.CancelledError:
+            # Shutdown: hand the job back now rather than leaving it RUNNING until its lease expires.
+            self._store.requeue(job_id)
+            raise
+        except LLMBusyError:
+            # Back-pressure from the limiter is transient: put the job back instead of failing it.
+            await asyncio.to_thread(self._store.requeue, job_id)
+            await asyncio.sleep(self._settings.llm_busy_retry_after_seconds)
+            return
+        except Exception as exc:  # noqa: BLE001
+            _logger.exception("Job %s failed: %s", job_id, exc)
+            await asyncio.to_thread(self._store.finish, job_id, FAILED, None, str(exc) or type(exc).__name__)
+        else:
+            result: Dict[str, Any] = {field: part.strip() for field, part in zip(SECTION_FIELDS, sections)}
+            result["summary_mode"] = mode
+            await asyncio.to_thread(self._store.finish, job_id, DONE, result, None)
+            _logger.info(json.dumps({"event": "job_done", "job_id": job_id, "mode": mode, "timings": timings}))
+
+        if row["callback_url"]:
+            await self._callback(row["callback_url"], job_id)
+
+    async def _callback(self, url: str, job_id: str) -> None:
+        job = await asyncio.to_thread(self._store.get, job_id)
+        try:
+            resp = await self._http.post(url, json=job)
+            resp.raise_for_status()
+        except Exception as exc:  # noqa: BLE001
+            _logger.warning("Callback for job %s to %s failed: %s", job_id, url, exc)
+
+
+def callback_allowed(url: str, settings: Settings) -> bool:
+    """Whether a caller-supplied callback URL matches a JOB_CALLBACK_ALLOWED_URLS prefix."""
+    target = urlsplit(url)
+    for allowed in settings.job_callback_allowed_urls.split(","):
+        prefix = urlsplit(allowed.strip())
+        # Compare scheme and host exactly so "https://hooks.example.com.evil.test" cannot pass as a prefix.
+        if (
+            prefix.scheme
+            and prefix.netloc
+            and (target.scheme, target.netloc.lower()) == (prefix.scheme, prefix.netloc.lower())
+            and target.path.startswith(prefix.path)
+        ):
+            return True
+    return False
+
+
+_store: Optional[JobStore] = None
+_pool: Optional[JobWorkerPool] = None
+
+register_callback(
+    "job_queue_depth",
+    "Jobs waiting in the queue.",
+    lambda: {(): float(_store.depth())} if _store is not None else {},
+)
+
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store."""
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = JobStore(settings.job_queue_path, settings.job_lease_seconds)
+    return _store
+
+
+def get_job_pool() -> JobWorkerPool:
+    """Return the process-wide worker pool."""
+    global _pool
+    if _pool is None:
+        _pool = JobWorkerPool(get_job_store(), get_settings())
+    return _pool
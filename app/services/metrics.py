@@ -0,0 +1,204 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+LabelValues = Tuple[str, ...]
+MetricT = TypeVar("MetricT", bound="_Metric")
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = _DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self._bounds = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self._bounds) + 1), [0.0]))
+            counts[bisect.bisect_left(self._bounds, value)] += 1
+            totals[0] += value
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, list(c), t[0]) for k, (c, t) in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self._bounds + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose samples are read from `collect` at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labels: Sequence[str] = (),
+        type_name: str = "gauge",
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.type_name = type_name
+        self._collect = collect
+
+    def _render_samples(self) -> List[str]:
+        try:
+            samples = self._collect()
+        except Exception:  # noqa: BLE001
+            return []
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in samples.items()]
+
+
+class Registry:
+    """Ordered set of metrics rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests by route and status.", ("method", "path", "status"))
+)
+HTTP_DURATION = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "path"))
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("summarizer_stage_seconds", "Latency of summarization stages.", ("stage",))
+)
+LLM_REQUESTS = REGISTRY.register(
+    Counter("llm_requests_total", "LLM calls by provider and outcome.", ("provider", "outcome"))
+)
+LLM_ERRORS = REGISTRY.register(
+    Counter("llm_errors_total", "LLM call failures by provider and error type.", ("provider", "type"))
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter("llm_tokens_total", "Token usage reported by providers.", ("provider", "kind"))
+)
+
+SUMMARY_PARSE = REGISTRY.register(
+    Counter("summary_parse_total", "How completions were parsed into sections.", ("path",))
+)
+
+_timings: "contextvars.ContextVar[Optional[Dict[str, float]]]" = contextvars.ContextVar("timings", default=None)
+
+
+def register_callback(
+    name: str,
+    help_text: str,
+    collect: Callable[[], Dict[LabelValues, float]],
+    labels: Sequence[str] = (),
+    type_name: str = "gauge",
+) -> None:
+    """Expose values owned by another component, read at scrape time."""
+    REGISTRY.register(CallbackMetric(name, help_text, collect, labels, type_name))
+
+
+def start_timings() -> Dict[str, float]:
+    """Begin collecting stage timings for the current request or job."""
+    timings: Dict[str, float] = {}
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage into the stage histogram and the current timings, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + elapsed, 6)
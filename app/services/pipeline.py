@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.config import get_settings
+from app.schemas import Comment, Ticket
+from app.services.cache import get_summary_cache, summary_cache_key
+from app.services.metrics import SUMMARY_PARSE, stage
+from app.services.prompt import build_incremental_json, build_ticket_json
+from app.services.summarizer import (
+    SECTION_FIELDS,
+    SectionStreamParser,
+    build_content,
+    build_incremental_content,
+    prompt_version,
+    provider_and_model,
+)
+from app.services.routing import get_router
+from app.services.scheduler import get_scheduler
+from app.services.ticket_state import get_ticket_state_store, new_comments_since
+
+
+_logger = logging.getLogger(__name__)
+
+# Tickets with more text than this are compacted off the event loop; small ones are cheaper inline.
+_OFFLOAD_PROMPT_CHARS = 50_000
+
+Sections = Tuple[str, str, str]
+T = TypeVar("T")
+
+
+async def _prepare(ticket: Ticket, structured: bool) -> Tuple[str, str]:
+    """Return the dynamic prompt content for a ticket and whether it is "full" or "incremental"."""
+    settings = get_settings()
+    if settings.incremental_summary_enabled:
+        state = await get_ticket_state_store().get(ticket.ticket_number)
+        new_comments = new_comments_since(ticket, state, _generator(structured))
+        if state is not None and new_comments:
+            _logger.info(
+                "Incremental summary for ticket %s: %d new comment(s)", ticket.ticket_number, len(new_comments)
+            )
+            with stage("prompt_build"):
+                meta_json, comments_json = await _off_loop(
+                    _text_size(new_comments), build_incremental_json, ticket, new_comments, settings
+                )
+                return build_incremental_content(state.sections, meta_json, comments_json), "incremental"
+
+    with stage("prompt_build"):
+        size = len(ticket.ticket_description) + _text_size(ticket.comments)
+        return build_content(await _off_loop(size, build_ticket_json, ticket, settings)), "full"
+
+
+def _text_size(comments: List[Comment]) -> int:
+    return sum(len(comment.content) for comment in comments)
+
+
+async def _off_loop(size: int, func: Callable[..., T], *args: Any) -> T:
+    """Run CPU-heavy prompt compaction in a thread when the input is large enough to stall the loop."""
+    if size > _OFFLOAD_PROMPT_CHARS:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+def _primary_provider() -> str:
+    # Budgets are charged to the primary provider even if the router fails over.
+    return provider_and_model(get_settings())[0]
+
+
+def _generator(structured: bool) -> str:
+    """Provider, model and prompt version that a stored summary was produced under."""
+    provider, model = provider_and_model(get_settings())
+    return f"{provider}:{model}:{prompt_version(structured)}"
+
+
+def _cache_key(ticket: Ticket, structured: bool) -> Optional[str]:
+    settings = get_settings()
+    if not settings.summary_cache_enabled:
+        return None
+    provider, model = provider_and_model(settings)
+    return summary_cache_key(ticket, provider, model, prompt_version(structured))
+
+
+async def _remember(ticket: Ticket, sections: Sections, structured: bool) -> None:
+    if get_settings().incremental_summary_enabled and any(part.strip() for part in sections):
+        await get_ticket_state_store().record(ticket, sections, _generator(structured))
+
+
+async def summarize(
+    ticket: Ticket, before_llm: Optional[Callable[[str], Awaitable[None]]] = None
+) -> Tuple[Sections, str]:
+    """Summarize a ticket, returning its sections and how they were produced.
+
+    The mode is "cached", "incremental" or "full". `before_llm` is awaited with the prompt content
+    only when the summary is not served from the cache.
+    """
+    mode = "cached"
+    structured = get_settings().structured_output_enabled
+
+    async def compute() -> Sections:
+        nonlocal mode
+        content, mode = await _prepare(ticket, structured)
+        if before_llm is not None:
+            await before_llm(content)
+        async with get_scheduler().slot(ticket, content, _primary_provider()):
+            return await get_router().complete(content)
+
+    key = _cache_key(ticket, structured)
+    if key is not None:
+        sections = await get_summary_cache().get_or_compute(key, compute)
+    else:
+        sections = await compute()
+
+    await _remember(ticket, sections, structured)
+    return sections, mode
+
+
+async def summarize_stream(ticket: Ticket) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("delta", {section, text}) events as the model writes, then one ("summary", {...}) event."""
+    # Streaming always asks for plain text, so it reads and writes the plain-mode cache entry.
+    key = _cache_key(ticket, structured=False)
+    cached = await get_summary_cache().get(key) if key is not None else None
+    if cached is not None:
+        for field, text in zip(SECTION_FIELDS, cached):
+            yield "delta", {"section": field, "text": text}
+        yield "summary", _summary_event(cached, "cached")
+        return
+
+    content, mode = await _prepare(ticket, structured=False)
+    parser = SectionStreamParser()
+    async with get_scheduler().slot(ticket, content, _primary_provider()):
+        async for delta in get_router().stream(content):
+            for field, text in parser.feed(delta):
+                yield "delta", {"section": field, "text": text}
+    for field, text in parser.flush():
+        yield "delta", {"section": field, "text": text}
+
+    # Use the streamed split so the final event agrees with the deltas already sent.
+    sections = parser.sections()
+    SUMMARY_PARSE.inc(path="stream")
+    if key is not None:
+        await get_summary_cache().put(key, sections)
+    await _remember(ticket, sections, structured=False)
+    yield "summary", _summary_event(sections, mode)
+
+
+def _summary_event(sections: Sections, mode: str) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {field: part.strip() for field, part in zip(SECTION_FIELDS, sections)}
+    payload["summary_mode"] = mode
+    return payload
@@ -0,0 +1,175 @@
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.config import Settings, get_settings
+from app.schemas import Comment, Ticket
+from app.services.metrics import register_callback
+
+
+_logger = logging.getLogger(__name__)
+
+# Lines shorter than this are too generic ("ok", "thanks") to count as repeated text.
+_MIN_DEDUP_LINE_CHARS = 24
+# Per-comment character cap never shrinks below this while fitting the budget.
+_MIN_COMMENT_CHARS = 200
+_WHITESPACE_RE = re.compile(r"[ \t]+")
+
+
+@dataclass
+class PromptStats:
+    """Cumulative token estimates before and after compaction."""
+    requests: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+
+stats = PromptStats()
+
+register_callback(
+    "prompt_tokens_estimated_total",
+    "Estimated ticket prompt tokens before and after compaction.",
+    lambda: {("before",): float(stats.tokens_before), ("after",): float(stats.tokens_after)},
+    ("phase",),
+    type_name="counter",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 UTF-8 bytes per token) good enough for budgeting."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _head_tail(text: str, limit: int) -> str:
+    """Keep the head and tail of an oversized body; logs usually matter at both ends."""
+    if len(text) <= limit:
+        return text
+    head = limit * 2 // 3
+    tail = limit - head
+    return text[:head] + f"\n…[{len(text) - limit} chars omitted]…\n" + text[-tail:]
+
+
+def _strip_repeats(text: str, seen: Set[str]) -> str:
+    """Drop quoted lines and long lines already present earlier in the ticket."""
+    kept = []
+    for line in text.replace("\r", "").split("\n"):
+        stripped = _WHITESPACE_RE.sub(" ", line).strip()
+        if stripped.startswith(">"):
+            continue
+        if len(stripped) >= _MIN_DEDUP_LINE_CHARS:
+            if stripped in seen:
+                continue
+            seen.add(stripped)
+        kept.append(line.rstrip())
+    return "\n".join(kept).strip()
+
+
+def _attachment_ref(comment: Comment) -> str:
+    reference = (comment.name or comment.content or "").strip()
+    # File references are often long URLs; the filename is what matters to the summary.
+    reference = reference.rstrip("/").rsplit("/", 1)[-1][:80]
+    return f"[attachment: {reference}]" if reference else "[attachment]"
+
+
+def _clean_comments(comments: List[Comment], seen: Set[str]) -> List[Tuple[Dict[str, Any], str, bool]]:
+    """Collapse attachments and drop repeated text once; returns (entry, content, truncatable)."""
+    cleaned = []
+    for comment in comments:
+        entry = comment.model_dump(exclude_none=True, exclude={"content"})
+        if comment.type == "attachment":
+            cleaned.append((entry, _attachment_ref(comment), False))
+            continue
+        content = _strip_repeats(comment.content, seen)
+        if content:
+            cleaned.append((entry, content, True))
+    return cleaned
+
+
+def _truncated(
+    cleaned: List[Tuple[Dict[str, Any], str, bool]], max_chars: int, keep: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    if keep is not None and len(cleaned) > 2 * keep:
+        omitted = len(cleaned) - 2 * keep
+        marker = ({"type": "note"}, f"[{omitted} comments omitted]", False)
+        cleaned = cleaned[:keep] + [marker] + cleaned[-keep:]
+    return [
+        {**entry, "content": _head_tail(content, max_chars) if truncatable else content}
+        for entry, content, truncatable in cleaned
+    ]
+
+
+def _fit(build: Callable[[int, Optional[int]], str], comment_count: int, settings: Settings) -> str:
+    """Rebuild with a shrinking per-comment cap, then fewer middle comments, until the estimate fits."""
+    budget = settings.prompt_token_budget
+    max_chars = settings.prompt_max_comment_chars
+    text = build(max_chars, None)
+    while estimate_tokens(text) > budget and max_chars > _MIN_COMMENT_CHARS:
+        max_chars = max(_MIN_COMMENT_CHARS, max_chars // 2)
+        text = build(max_chars, None)
+    # Still too long: keep the opening and latest comments, where the problem and outcome usually are.
+    keep = comment_count // 2
+    while estimate_tokens(text) > budget and keep > 1:
+        keep = max(1, keep // 2)
+        text = build(max_chars, keep)
+    return text
+
+
+def _record(label: str, ticket: Ticket, before: str, after: str, settings: Settings) -> None:
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+    stats.requests += 1
+    stats.tokens_before += tokens_before
+    stats.tokens_after += tokens_after
+    _logger.info(
+        "Prompt %s for ticket %s: ~%d -> ~%d tokens", label, ticket.ticket_number, tokens_before, tokens_after
+    )
+    if tokens_after > settings.prompt_token_budget:
+        _logger.warning(
+            "Prompt for ticket %s is still ~%d tokens, over the %d-token budget",
+            ticket.ticket_number,
+            tokens_after,
+            settings.prompt_token_budget,
+        )
+
+
+def build_ticket_json(ticket: Ticket, settings: Optional[Settings] = None) -> str:
+    """Compact JSON for a full summary, fitted to the configured token budget."""
+    settings = settings or get_settings()
+    base = ticket.model_dump(exclude={"comments"}, exclude_none=True)
+    base["ticket_description"] = _head_tail(ticket.ticket_description.strip(), settings.prompt_max_comment_chars * 2)
+
+    seen: Set[str] = set()
+    _strip_repeats(ticket.ticket_description, seen)
+    cleaned = _clean_comments(ticket.comments, seen)
+
+    def build(max_chars: int, keep: Optional[int]) -> str:
+        return _compact_json({**base, "comments": _truncated(cleaned, max_chars, keep)})
+
+    compacted = _fit(build, len(cleaned), settings)
+    before = json.dumps(ticket.model_dump(), ensure_ascii=False, indent=2)
+    _record("compacted", ticket, before, compacted, settings)
+    return compacted
+
+
+def build_incremental_json(
+    ticket: Ticket, new_comments: List[Comment], settings: Optional[Settings] = None
+) -> Tuple[str, str]:
+    """Compact ticket metadata and new-comment JSON for an incremental summary."""
+    settings = settings or get_settings()
+    meta = _compact_json(ticket.model_dump(exclude={"comments", "ticket_description"}, exclude_none=True))
+
+    cleaned = _clean_comments(new_comments, set())
+
+    def build(max_chars: int, keep: Optional[int]) -> str:
+        return _compact_json(_truncated(cleaned, max_chars, keep))
+
+    compacted = _fit(build, len(cleaned), settings)
+    before = json.dumps([c.model_dump() for c in new_comments], ensure_ascii=False, indent=2)
+    _record("incremental", ticket, before, compacted, settings)
+    return meta, compacted
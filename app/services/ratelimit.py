@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`.
+
+    A rate of 0 disables limiting. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate_per_minute = rate_per_minute
+        self._rate = rate_per_minute / 60.0
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self._rate <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """Tokens that could be taken right now."""
+        if self.unlimited:
+            return float("inf")
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens would be available; 0 if they are now."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(amount, self._capacity) - self._tokens
+        return max(0.0, missing / self._rate)
+
+    def try_acquire(self, amount: float) -> bool:
+        """Take `amount` tokens if available right now, without waiting."""
+        if self.unlimited:
+            return True
+        if self._lock.locked():
+            return False
+        self._refill()
+        amount = min(amount, self._capacity)
+        if self._tokens < amount:
+            return False
+        self._tokens -= amount
+        return True
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until `amount` tokens are available and take them."""
+        if self.unlimited:
+            return
+        # Requests larger than the bucket would never fit; let them drain it instead.
+        amount = min(amount, self._capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._rate)
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import openai
+
+from app.config import Settings, get_settings
+from app.services.concurrency import LLMBusyError
+from app.services.metrics import LLM_ERRORS, register_callback
+from app.services.summarizer import complete_async, configured_providers, stream_async
+
+
+_logger = logging.getLogger(__name__)
+
+Sections = Tuple[str, str, str]
+
+# Latency samples kept per provider and the minimum before the p95 drives hedging.
+_LATENCY_WINDOW = 200
+_MIN_SAMPLES_FOR_P95 = 20
+
+_TIMEOUTS = (openai.APITimeoutError, asyncio.TimeoutError)
+# Transient errors count toward the breaker; all but timeouts are also retried on the same provider.
+_RETRYABLE = _TIMEOUTS + (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class ProvidersUnavailableError(RuntimeError):
+    """Raised when every provider's circuit breaker is open."""
+
+
+class ProviderHealth:
+    """Latency window and circuit breaker for one provider."""
+
+    def __init__(self) -> None:
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < _MIN_SAMPLES_FOR_P95:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+
+class Router:
+    """Retries, fails over and optionally hedges LLM calls across configured providers."""
+
+    def __init__(self) -> None:
+        self._health: Dict[str, ProviderHealth] = {}
+
+    def health(self, provider: str) -> ProviderHealth:
+        return self._health.setdefault(provider, ProviderHealth())
+
+    def candidates(self, settings: Settings) -> List[str]:
+        """Configured providers whose breaker lets a call through, primary first."""
+        providers = configured_providers(settings)
+        if not providers:
+            raise RuntimeError("No LLM provider API key configured.")
+        now = time.monotonic()
+        allowed = []
+        for provider in providers:
+            health = self.health(provider)
+            if health.opened_at is None:
+                allowed.append(provider)
+            elif now - health.opened_at >= settings.llm_breaker_cooldown_seconds:
+                # Half-open: let one trial through per cooldown; success closes the breaker.
+                health.opened_at = now
+                allowed.append(provider)
+        if not allowed:
+            raise ProvidersUnavailableError("All LLM providers are unavailable (circuit open).")
+        return allowed
+
+    def record_success(self, provider: str, latency: float) -> None:
+        health = self.health(provider)
+        health.latencies.append(latency)
+        if health.opened_at is not None:
+            _logger.info("Circuit closed for provider=%s", provider)
+        health.consecutive_failures = 0
+        health.opened_at = None
+
+    def record_failure(self, provider: str, exc: BaseException, settings: Settings) -> None:
+        LLM_ERRORS.inc(provider=provider, type=type(exc).__name__)
+        if not isinstance(exc, _RETRYABLE):
+            # Client errors (e.g. a ticket over the context limit) say nothing about the provider's health.
+            return
+        health = self.health(provider)
+        health.consecutive_failures += 1
+        if health.opened_at is None and health.consecutive_failures >= settings.llm_breaker_failure_threshold:
+            health.opened_at = time.monotonic()
+            _logger.warning(
+                "Circuit opened for provider=%s after %d consecutive failures (last: %r)",
+                provider, health.consecutive_failures, exc,
+            )
+
+    def hedge_delay(self, provider: str, settings: Settings) -> float:
+        """How long to wait on `provider` before firing a hedge request elsewhere."""
+        p95 = self.health(provider).p95()
+        delay = p95 if p95 is not None else settings.llm_hedge_default_delay_seconds
+        return max(delay, settings.llm_hedge_min_delay_seconds)
+
+    async def _attempt(self, provider: str, content: str, settings: Settings) -> Sections:
+        """Call one provider, retrying transient errors with jittered exponential backoff.
+
+        Timeouts are not retried: a provider that was slow once is likely slow again, so fail over instead.
+        """
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                sections = await complete_async(content, provider)
+            except LLMBusyError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self.record_failure(provider, exc, settings)
+                if not isinstance(exc, _RETRYABLE) or isinstance(exc, _TIMEOUTS):
+                    raise
+                if attempt >= settings.llm_max_retries:
+                    raise
+                if self.health(provider).opened_at is not None:
+                    raise
+                delay = settings.llm_retry_backoff_seconds * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
+                continue
+            self.record_success(provider, time.monotonic() - started)
+            return sections
+
+    async def complete(self, content: str) -> Sections:
+        """First good answer across providers, failing over on errors and hedging on slowness.
+
+        The whole call, retries and failover included, is bounded by LLM_DEADLINE_SECONDS.
+        """
+        settings = get_settings()
+        deadline = time.monotonic() + settings.llm_deadline_seconds if settings.llm_deadline_seconds > 0 else None
+        remaining = self.candidates(settings)
+        running: Dict["asyncio.Task[Sections]", str] = {}
+        last_exc: Optional[BaseException] = None
+
+        def launch() -> None:
+            provider = remaining.pop(0)
+            running[asyncio.create_task(self._attempt(provider, content, settings))] = provider
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError(f"No LLM answer within {settings.llm_deadline_seconds:g}s.")
+                hedge = None
+                if settings.llm_hedge_enabled and remaining and len(running) == 1:
+                    hedge = self.hedge_delay(next(iter(running.values())), settings)
+                    if timeout is None or hedge < timeout:
+                        timeout = hedge
+                    else:
+                        hedge = None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if hedge is not None:
+                        _logger.info("Hedging LLM request to %s after %.2fs", remaining[0], hedge)
+                        launch()
+                    continue
+                for task in done:
+                    provider = running.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        return task.result()
+                    _logger.warning("Provider %s gave up: %r", provider, exc)
+                    last_exc = exc
+                if not running and remaining:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+        assert last_exc is not None
+        raise last_exc
+
+    async def stream(self, content: str) -> AsyncIterator[str]:
+        """Stream from the first healthy provider, failing over only before any text was sent."""
+        settings = get_settings()
+        last_exc: Optional[BaseException] = None
+        for provider in self.candidates(settings):
+            started = time.monotonic()
+            sent = False
+            try:
+                async for delta in stream_async(content, provider):
+                    sent = True
+                    yield delta
+            except LLMBusyError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self.record_failure(provider, exc, settings)
+                if sent:
+                    raise
+                last_exc = exc
+                continue
+            self.record_success(provider, time.monotonic() - started)
+            return
+        assert last_exc is not None
+        raise last_exc
+
+
+_router: Optional[Router] = None
+
+
+def _breaker_states() -> Dict[Tuple[str, ...], float]:
+    if _router is None:
+        return {}
+    return {(p,): float(h.opened_at is not None) for p, h in _router._health.items()}
+
+
+register_callback("llm_circuit_open", "1 while a provider's circuit breaker is open.", _breaker_states, ("provider",))
+
+
+def get_router() -> Router:
+    """Return the process-wide provider router."""
+    global _router
+    if _router is None:
+        _router = Router()
+    return _router
@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.config import Settings, get_settings
+from app.schemas import Ticket
+from app.services.concurrency import LLMBusyError, effective_limit
+from app.services.metrics import REGISTRY, Counter, Histogram, register_callback
+from app.services.prompt import estimate_tokens
+from app.services.ratelimit import TokenBucket
+from app.services.summarizer import MAX_OUTPUT_TOKENS
+
+
+_logger = logging.getLogger(__name__)
+
+# Lower ranks are admitted first; unknown priorities rank as "normal".
+_PRIORITY_RANK = {"critical": 0, "high": 1, "normal": 2}
+# "open" and the "<team> workflow" statuses still need a reply; resolved and closed tickets are archival.
+_STATUS_RANK = {"resolved": 1, "closed": 1}
+_STATUS_LEVELS = 2
+
+_WAIT_SECONDS = REGISTRY.register(
+    Histogram("scheduler_wait_seconds", "Time LLM calls waited for scheduler admission.", ("priority",))
+)
+_SHED = REGISTRY.register(
+    Counter("scheduler_shed_total", "LLM calls rejected by the scheduler.", ("priority", "reason"))
+)
+
+
+class LLMShedError(LLMBusyError):
+    """Raised when the scheduler turns a call away instead of queueing it."""
+
+    def __init__(self, provider: str, retry_after_seconds: float, reason: str) -> None:
+        super().__init__(provider, retry_after_seconds)
+        self.args = (f"Scheduler shed LLM call for provider {provider!r} ({reason}).",)
+        self.reason = reason
+
+
+def ticket_rank(ticket: Ticket) -> int:
+    """Scheduling rank of a ticket: by priority, then status. Lower runs first."""
+    priority = _PRIORITY_RANK.get(ticket.ticket_priority.strip().lower(), _PRIORITY_RANK["normal"])
+    status = _STATUS_RANK.get(ticket.ticket_status.strip().lower(), 0)
+    return priority * _STATUS_LEVELS + status
+
+
+def _priority_label(ticket: Ticket) -> str:
+    priority = ticket.ticket_priority.strip().lower()
+    return priority if priority in _PRIORITY_RANK else "other"
+
+
+def _label_limits(spec: str) -> Dict[str, float]:
+    """Parse "label=tokens_per_minute,..." overrides."""
+    limits = {}
+    for item in spec.split(","):
+        label, _, rate = item.partition("=")
+        if label.strip() and rate.strip():
+            limits[label.strip()] = float(rate)
+    return limits
+
+
+def _shed_priorities(settings: Settings) -> Set[str]:
+    return {p.strip().lower() for p in settings.scheduler_shed_priorities.split(",") if p.strip()}
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    priority: str = field(compare=False)
+    provider_bucket: TokenBucket = field(compare=False)
+    label_buckets: List[TokenBucket] = field(compare=False)
+    tokens: float = field(compare=False)
+    future: "asyncio.Future[None]" = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+    def wait_time(self) -> float:
+        return max(b.wait_time(self.tokens) for b in [self.provider_bucket, *self.label_buckets])
+
+
+class LLMScheduler:
+    """Admits LLM calls in priority order under per-provider and per-label token budgets."""
+
+    def __init__(self) -> None:
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._provider_buckets: Dict[str, TokenBucket] = {}
+        self._label_buckets: Dict[str, TokenBucket] = {}
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def _bucket(buckets: Dict[str, TokenBucket], key: str, rate: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None or bucket.rate_per_minute != rate:
+            bucket = TokenBucket(rate)
+            buckets[key] = bucket
+        return bucket
+
+    def _label_buckets_for(self, ticket: Ticket, settings: Settings) -> List[TokenBucket]:
+        overrides = _label_limits(settings.scheduler_label_limits)
+        buckets = []
+        for label in sorted(set(ticket.ticket_labels)):
+            rate = overrides.get(label, settings.scheduler_label_tokens_per_minute)
+            if rate > 0:
+                buckets.append(self._bucket(self._label_buckets, label, rate))
+        return buckets
+
+    def depth(self) -> Dict[str, int]:
+        """Waiting calls per priority."""
+        counts: Dict[str, int] = {}
+        for waiter in self._waiting:
+            counts[waiter.priority] = counts.get(waiter.priority, 0) + 1
+        return counts
+
+    def _admit(self, waiter: _Waiter) -> None:
+        for bucket in [waiter.provider_bucket, *waiter.label_buckets]:
+            bucket.try_acquire(waiter.tokens)
+        self._waiting.remove(waiter)
+        self._running += 1
+        _WAIT_SECONDS.observe(time.monotonic() - waiter.enqueued_at, priority=waiter.priority)
+        waiter.future.set_result(None)
+
+    def _pump(self) -> None:
+        """Admit waiters in rank order while concurrency and budgets allow."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        settings = get_settings()
+        # By default queue by priority up to the limiter's cap, so the limiter never rejects in arrival order.
+        max_running = settings.scheduler_max_concurrency or effective_limit(settings)
+        retry_in: Optional[float] = None
+        for waiter in list(self._waiting):
+            if self._running >= max_running:
+                break
+            provider_wait = waiter.provider_bucket.wait_time(waiter.tokens)
+            label_wait = max((b.wait_time(waiter.tokens) for b in waiter.label_buckets), default=0.0)
+            if provider_wait <= 0 and label_wait <= 0:
+                self._admit(waiter)
+                continue
+            wait = max(provider_wait, label_wait)
+            retry_in = wait if retry_in is None else min(retry_in, wait)
+            # The provider budget is shared, so lower ranks must not jump ahead of this waiter;
+            # a label budget only holds back its own tenant.
+            if provider_wait > 0:
+                break
+        if retry_in is not None:
+            self._wakeup = asyncio.get_running_loop().call_later(retry_in, self._pump)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter.future.done() and not waiter.future.cancelled():
+            # Admitted just as the caller gave up: hand the slot back.
+            self._running -= 1
+        else:
+            waiter.future.cancel()
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+        self._pump()
+
+    def _shed(self, waiter: _Waiter, provider: str, reason: str, settings: Settings) -> LLMShedError:
+        _SHED.inc(priority=waiter.priority, reason=reason)
+        retry_after = max(settings.llm_busy_retry_after_seconds, waiter.wait_time())
+        _logger.warning("Scheduler shed %s-priority call for provider=%s (%s)", waiter.priority, provider, reason)
+        return LLMShedError(provider, retry_after, reason)
+
+    @asynccontextmanager
+    async def slot(
+        self, ticket: Ticket, content: str, provider: str, settings: Optional[Settings] = None
+    ) -> AsyncIterator[None]:
+        """Wait for the ticket's turn and budget, or raise `LLMShedError` when it is shed."""
+        settings = settings or get_settings()
+        waiter = _Waiter(
+            rank=ticket_rank(ticket),
+            seq=next(self._seq),
+            priority=_priority_label(ticket),
+            provider_bucket=self._bucket(
+                self._provider_buckets, provider, settings.scheduler_provider_tokens_per_minute
+            ),
+            label_buckets=self._label_buckets_for(ticket, settings),
+            tokens=estimate_tokens(content) + MAX_OUTPUT_TOKENS,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic(),
+        )
+        bisect.insort(self._waiting, waiter)
+        self._pump()
+
+        if not waiter.future.done():
+            if waiter.priority in _shed_priorities(settings) and waiter.wait_time() > 0:
+                # Budget exhausted: low-priority work is turned away rather than queued behind it.
+                self._abandon(waiter)
+                raise self._shed(waiter, provider, "budget", settings)
+            timeout = settings.scheduler_max_wait_seconds
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout if timeout > 0 else None)
+            except asyncio.TimeoutError as exc:
+                self._abandon(waiter)
+                raise self._shed(waiter, provider, "timeout", settings) from exc
+            except BaseException:
+                self._abandon(waiter)
+                raise
+
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._pump()
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def _depth() -> Dict[Tuple[str, ...], float]:
+    if _scheduler is None:
+        return {}
+    return {(priority,): float(count) for priority, count in _scheduler.depth().items()}
+
+
+register_callback("scheduler_queue_depth", "LLM calls waiting for scheduler admission.", _depth, ("priority",))
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide LLM scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
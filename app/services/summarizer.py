@@ -1,9 +1,16 @@
+import hashlib
 import logging
-from typing import Tuple
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import openai
+from pydantic import ValidationError
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.schemas import SummarySections
+from app.services.clients import get_client_registry
+from app.services.concurrency import get_concurrency_limiter
+from app.services.metrics import LLM_REQUESTS, LLM_TOKENS, SUMMARY_PARSE, stage
 
 
 _logger = logging.getLogger(__name__)
@@ -63,51 +70,72 @@ also consider that there is not need to tell the exact details just the importan
 
 """
 
+# Bumped whenever the dynamic content layout changes (2: compact ticket JSON).
+_INPUT_FORMAT = "2"
+
+# Part of the summary cache key: editing the prompt invalidates cached summaries.
+PROMPT_VERSION = hashlib.sha256((_SYSTEM_PROMPT + _INPUT_FORMAT).encode("utf-8")).hexdigest()[:12]
+
+# Output cap requested from every provider; also the output share of rate-limit estimates.
+MAX_OUTPUT_TOKENS = 600
+
+
+def build_content(ticket_json_str: str) -> str:
+    """Build the dynamic part of the prompt for a full summary."""
+    return "تیکت:\n<JSON>\n" + ticket_json_str + "\n</JSON>"
+
 
 def _build_input(ticket_json_str: str) -> str:
     """Build the single input string concatenating system rules and dynamic content."""
+    return _SYSTEM_PROMPT + "\n\n" + build_content(ticket_json_str)
+
+
+def build_incremental_content(
+    previous: Tuple[str, str, str], ticket_meta_json_str: str, new_comments_json_str: str
+) -> str:
+    """Build the dynamic part of the prompt for updating an existing summary with new comments."""
+    problem, resolution_summary, result_and_key_points = previous
     return (
-        _SYSTEM_PROMPT
-        + "\n\n"
+        "this ticket was already summarized. below is the previous summary and only the comments added since then. "
+        + "update the summary so it covers the new comments and keep the same three sections.\n\n"
+        + "خلاصه قبلی:\n"
+        + "1. مسئله:\n" + problem.strip() + "\n"
+        + "2. روند حل به‌صورت خلاصه:\n" + resolution_summary.strip() + "\n"
+        + "3. نتیجه و نکات کلیدی:\n" + result_and_key_points.strip() + "\n\n"
         + "تیکت:\n<JSON>\n"
-        + ticket_json_str
+        + ticket_meta_json_str
+        + "\n</JSON>\n\n"
+        + "کامنت‌های جدید:\n<JSON>\n"
+        + new_comments_json_str
         + "\n</JSON>"
     )
 
 
+def _heading_index(line: str) -> Optional[int]:
+    """Section index a heading line opens, shared by the full and streaming parsers."""
+    stripped = line.strip().lstrip("#*- ")
+    for index, (digit, keyword) in enumerate((("1", "مسئله"), ("2", "روند"), ("3", "نتیجه"))):
+        if stripped.startswith(digit) and (keyword in line or ")" in line or "." in line):
+            return index
+        if stripped.startswith(keyword):
+            return index
+    return None
+
+
 def _parse_three_sections(text: str) -> Tuple[str, str, str]:
     """Parse the model output into three sections using simple heuristics."""
     normalized = text.replace("\r", "").strip()
 
-    # Try split by numbered lines.
-    parts = []
-    current = []
+    # Try split by heading lines; sections only move forward, so numbered steps inside one are kept.
+    section = 0
+    parts = ["", "", ""]
     for line in normalized.split("\n"):
-        if line.strip().startswith("1") and ("مسئله" in line or ")" in line or "." in line):
-            if current:
-                parts.append("\n".join(current).strip())
-                current = []
-            current.append(line)
-        elif line.strip().startswith("2") and ("روند" in line or ")" in line or "." in line):
-            if current:
-                parts.append("\n".join(current).strip())
-                current = []
-            current.append(line)
-        elif line.strip().startswith("3") and ("نتیجه" in line or ")" in line or "." in line):
-            if current:
-                parts.append("\n".join(current).strip())
-                current = []
-            current.append(line)
-        else:
-            current.append(line)
-    if current:
-        parts.append("\n".join(current).strip())
-
-    if len(parts) >= 3:
-        section1 = parts[0].strip()
-        section2 = parts[1].strip()
-        section3 = parts[2].strip()
-        return section1, section2, section3
+        index = _heading_index(line)
+        if index is not None and index > section:
+            section = index
+        parts[section] += line + "\n"
+    if section == 2:
+        return parts[0].strip(), parts[1].strip(), parts[2].strip()
 
     # Fallback: split by headings keywords.
     keywords = ["مسئله", "روند", "نتیجه"]
@@ -131,76 +159,356 @@ def _parse_three_sections(text: str) -> Tuple[str, str, str]:
     return normalized, "", ""
 
 
-def summarize_ticket(ticket_json_str: str) -> Tuple[str, str, str]:
-    """Summarize the ticket content and return three Persian sections."""
-    settings = get_settings()
-    provider = settings.llm_provider.lower()
+SECTION_FIELDS = ("problem", "resolution_summary", "result_and_key_points")
+
+
+class SectionStreamParser:
+    """Tag streamed completion text with its section as it arrives.
+
+    A partial line is held back only until it is long enough to rule on whether it
+    is a heading, so text reaches the client well before the line ends.
+    """
+
+    _HOLD_CHARS = 32
+
+    def __init__(self) -> None:
+        self._section = 0
+        self._line = ""
+        self._emitted = 0
+        self._classified = False
+        self._parts = ["", "", ""]
+
+    def _classify(self) -> None:
+        if not self._classified:
+            index = _heading_index(self._line)
+            # Sections only move forward; numbered steps inside a section are not headings.
+            if index is not None and index > self._section:
+                self._section = index
+            self._classified = True
+
+    def _take(self, upto: int) -> str:
+        text = self._line[self._emitted:upto]
+        self._emitted = upto
+        return text
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        """Consume a text delta and return (section, text) chunks ready to emit."""
+        chunks: List[Tuple[str, str]] = []
+
+        def emit(text: str) -> None:
+            if not text:
+                return
+            self._parts[self._section] += text
+            field = SECTION_FIELDS[self._section]
+            if chunks and chunks[-1][0] == field:
+                chunks[-1] = (field, chunks[-1][1] + text)
+            else:
+                chunks.append((field, text))
+
+        self._line += delta.replace("\r", "")
+        while "\n" in self._line:
+            end = self._line.index("\n")
+            self._line, rest = self._line[:end], self._line[end + 1:]
+            self._classify()
+            emit(self._take(len(self._line)) + "\n")
+            self._line, self._emitted, self._classified = rest, 0, False
+
+        if len(self._line.strip()) >= self._HOLD_CHARS:
+            self._classify()
+        if self._classified:
+            emit(self._take(len(self._line)))
+        return chunks
+
+    def flush(self) -> List[Tuple[str, str]]:
+        """Emit whatever is still held back once the stream ends."""
+        self._classify()
+        text = self._take(len(self._line))
+        self._parts[self._section] += text
+        return [(SECTION_FIELDS[self._section], text)] if text else []
+
+    def sections(self) -> Tuple[str, str, str]:
+        """Sections accumulated so far, matching the emitted chunks."""
+        if not any(part.strip() for part in self._parts):
+            _logger.warning("Empty response from model.")
+        return self._parts[0].strip(), self._parts[1].strip(), self._parts[2].strip()
+
+
+def _provider_name(settings: Settings) -> str:
+    """Normalize the configured provider to "openai" or "openrouter"."""
+    return "openrouter" if settings.llm_provider.lower() == "openrouter" else "openai"
+
+
+def configured_providers(settings: Settings) -> List[str]:
+    """Providers to route across, primary first; only those with an API key are usable."""
+    names = [name.strip().lower() for name in settings.llm_providers.split(",") if name.strip()]
+    ordered = [_provider_name(settings)] + [n for n in names if n in ("openai", "openrouter")]
+    providers = list(dict.fromkeys(ordered))
+    keys = {"openai": settings.openai_api_key, "openrouter": settings.openrouter_api_key}
+    return [p for p in providers if keys[p]]
+
+
+def provider_and_model(settings: Settings) -> Tuple[str, str]:
+    """Return the active provider name and the model it will be called with."""
+    provider = _provider_name(settings)
+    model = settings.openrouter_model if provider == "openrouter" else settings.openai_model
+    return provider, model
+
+
+def _require_api_key(provider: str, settings: Settings) -> None:
+    """Fail fast when the selected provider has no API key configured."""
+    if provider == "openrouter":
+        if not settings.openrouter_api_key:
+            _logger.error("OPENROUTER_API_KEY is missing.")
+            raise RuntimeError("OpenRouter API key not configured.")
+    elif not settings.openai_api_key:
+        _logger.error("OPENAI_API_KEY is missing.")
+        raise RuntimeError("OpenAI API key not configured.")
+
+
+_STRUCTURED_INSTRUCTION = (
+    'respond only with a json object with the string fields "problem", "resolution_summary" and '
+    '"result_and_key_points" holding the three persian sections, without headings.'
+)
+
+_SUMMARY_JSON_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "problem": {"type": "string"},
+        "resolution_summary": {"type": "string"},
+        "result_and_key_points": {"type": "string"},
+    },
+    "required": ["problem", "resolution_summary", "result_and_key_points"],
+    "additionalProperties": False,
+}
 
-    user_input = _build_input(ticket_json_str)
+_STRUCTURED_PROMPT_VERSION = hashlib.sha256((PROMPT_VERSION + _STRUCTURED_INSTRUCTION).encode("utf-8")).hexdigest()[:12]
 
-    try:
-        if provider == "openrouter":
-            if not settings.openrouter_api_key:
-                _logger.error("OPENROUTER_API_KEY is missing.")
-                raise RuntimeError("OpenRouter API key not configured.")
-
-            client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=settings.openrouter_api_key,
-            )
-            client = client.with_options(timeout=settings.request_timeout_seconds)
-
-            extra_headers = {}
-            if settings.openrouter_site_url:
-                extra_headers["HTTP-Referer"] = settings.openrouter_site_url
-            if settings.openrouter_site_name:
-                extra_headers["X-Title"] = settings.openrouter_site_name
-
-            completion = client.chat.completions.create(
-                model=settings.openrouter_model,
-                messages=[
-                    {"role": "system", "content": _SYSTEM_PROMPT},
-                    {"role": "user", "content": user_input},
-                ],
-                temperature=0.2,
-                max_tokens=600,
-                extra_headers=extra_headers or None,
-            )
 
-            try:
-                text = completion.choices[0].message.content or ""
-            except Exception:  # noqa: BLE001
-                text = ""
-        else:
-            if not settings.openai_api_key:
-                _logger.error("OPENAI_API_KEY is missing.")
-                raise RuntimeError("OpenAI API key not configured.")
-
-            client = OpenAI(api_key=settings.openai_api_key)
-            client = client.with_options(timeout=settings.request_timeout_seconds)
-
-            resp = client.responses.create(
-                model=settings.openai_model,
-                input=user_input,
-                temperature=0.2,
-                max_output_tokens=600,
-            )
+def prompt_version(structured: bool) -> str:
+    """Cache-key prompt version; structured output is prompted and parsed differently, so it is keyed apart."""
+    return _STRUCTURED_PROMPT_VERSION if structured else PROMPT_VERSION
+
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
 
-            try:
-                text = resp.output_text  # SDK v1 convenience accessor.
-            except Exception:  # noqa: BLE001
-                # Structured fallback.
-                try:
-                    first = resp.output[0]
-                    text = getattr(first, "content", "") or ""
-                except Exception:  # noqa: BLE001
-                    text = ""
-    except Exception as exc:  # noqa: BLE001
-        _logger.exception("LLM request failed: %s", exc)
-        raise
+def _openrouter_request(settings: Settings, content: str, structured: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for an OpenRouter chat completion; rules go in the system message only."""
+    extra_headers = {}
+    if settings.openrouter_site_url:
+        extra_headers["HTTP-Referer"] = settings.openrouter_site_url
+    if settings.openrouter_site_name:
+        extra_headers["X-Title"] = settings.openrouter_site_name
 
+    request: Dict[str, Any] = {
+        "model": settings.openrouter_model,
+        "messages": [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": content + ("\n\n" + _STRUCTURED_INSTRUCTION if structured else "")},
+        ],
+        "temperature": 0.2,
+        "max_tokens": MAX_OUTPUT_TOKENS,
+        "extra_headers": extra_headers or None,
+    }
+    if structured:
+        request["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "ticket_summary", "strict": True, "schema": _SUMMARY_JSON_SCHEMA},
+        }
+    return request
+
+
+def _openai_request(settings: Settings, content: str, structured: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for an OpenAI Responses API call."""
+    request: Dict[str, Any] = {
+        "model": settings.openai_model,
+        "input": _SYSTEM_PROMPT + "\n\n" + content + ("\n\n" + _STRUCTURED_INSTRUCTION if structured else ""),
+        "temperature": 0.2,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+    }
+    if structured:
+        request["text"] = {
+            "format": {
+                "type": "json_schema",
+                "name": "ticket_summary",
+                "strict": True,
+                "schema": _SUMMARY_JSON_SCHEMA,
+            }
+        }
+    return request
+
+
+def _extract_text(provider: str, resp: Any) -> str:
+    """Pull the completion text out of a provider response."""
+    if provider == "openrouter":
+        try:
+            return resp.choices[0].message.content or ""
+        except Exception:  # noqa: BLE001
+            return ""
+
+    try:
+        return resp.output_text  # SDK v1 convenience accessor.
+    except Exception:  # noqa: BLE001
+        # Structured fallback.
+        try:
+            first = resp.output[0]
+            return getattr(first, "content", "") or ""
+        except Exception:  # noqa: BLE001
+            return ""
+
+
+def _record_usage(provider: str, usage: Any) -> None:
+    """Count prompt/completion tokens from a Responses or Chat Completions usage object."""
+    if usage is None:
+        return
+    prompt = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None) or 0
+    completion = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None) or 0
+    LLM_TOKENS.inc(prompt, provider=provider, kind="prompt")
+    LLM_TOKENS.inc(completion, provider=provider, kind="completion")
+
+
+def _stream_usage(provider: str, event: Any) -> Any:
+    """Usage carried by a streamed event (final chunk / response.completed), if any."""
+    if provider == "openrouter":
+        return getattr(event, "usage", None)
+    if getattr(event, "type", "") == "response.completed":
+        return getattr(getattr(event, "response", None), "usage", None)
+    return None
+
+
+def parse_completion(text: str) -> Tuple[str, str, str]:
+    """Split the completion text into sections, tolerating empty output."""
     if not text:
         _logger.warning("Empty response from model.")
         return "", "", ""
 
     return _parse_three_sections(text)
+
+
+def _parse_structured(text: str) -> Tuple[Optional[Tuple[str, str, str]], str]:
+    """Validate JSON output against `SummarySections`, repairing fences or surrounding prose.
+
+    Returns the sections and "structured" or "repaired", or (None, "") when unusable.
+    """
+    try:
+        parsed = SummarySections.model_validate_json(text)
+        path = "structured"
+    except ValidationError:
+        candidate = _FENCE_RE.sub("", text)
+        start, end = candidate.find("{"), candidate.rfind("}")
+        if start == -1 or end <= start:
+            return None, ""
+        try:
+            parsed = SummarySections.model_validate_json(candidate[start:end + 1])
+        except ValidationError:
+            return None, ""
+        path = "repaired"
+    return (parsed.problem, parsed.resolution_summary, parsed.result_and_key_points), path
+
+
+def _stream_delta(provider: str, event: Any) -> str:
+    """Text delta carried by one streamed provider event, if any."""
+    if provider == "openrouter":
+        try:
+            return event.choices[0].delta.content or ""
+        except Exception:  # noqa: BLE001
+            return ""
+    if getattr(event, "type", "") == "response.output_text.delta":
+        return getattr(event, "delta", "") or ""
+    return ""
+
+
+async def _request_text(provider: str, settings: Settings, content: str, structured: bool) -> str:
+    """One provider call under the concurrency limit, returning the completion text."""
+    async with get_concurrency_limiter().slot(provider, settings):
+        try:
+            client = get_client_registry().get_async(provider, settings)
+            with stage("llm"):
+                if provider == "openrouter":
+                    resp = await client.chat.completions.create(
+                        **_openrouter_request(settings, content, structured)
+                    )
+                else:
+                    resp = await client.responses.create(**_openai_request(settings, content, structured))
+            text = _extract_text(provider, resp)
+        except Exception as exc:  # noqa: BLE001
+            # The router decides whether to retry; keep per-attempt failures terse.
+            LLM_REQUESTS.inc(provider=provider, outcome="error")
+            _logger.warning("LLM request to %s failed: %r", provider, exc)
+            raise
+    LLM_REQUESTS.inc(provider=provider, outcome="ok")
+    _record_usage(provider, getattr(resp, "usage", None))
+    return text
+
+
+async def complete_async(content: str, provider: Optional[str] = None) -> Tuple[str, str, str]:
+    """Send prebuilt dynamic content to a provider (default: configured) and parse the three sections.
+
+    In structured-output mode the JSON answer is validated first; the heuristic parser is the
+    fallback, and the model is re-asked only when neither yields all three sections.
+    """
+    settings = get_settings()
+    provider = provider or _provider_name(settings)
+    _require_api_key(provider, settings)
+
+    if not settings.structured_output_enabled:
+        text = await _request_text(provider, settings, content, structured=False)
+        with stage("parse"):
+            sections = parse_completion(text)
+        SUMMARY_PARSE.inc(path="heuristic")
+        return sections
+
+    attempt = 0
+    while True:
+        try:
+            text = await _request_text(provider, settings, content, structured=True)
+        except (openai.BadRequestError, openai.UnprocessableEntityError) as exc:
+            # Usually a model without json_schema support: fall back to the plain prompt and heading parser.
+            _logger.warning(
+                "Structured request to %s rejected (%s); retrying without response format.", provider, exc
+            )
+            text = await _request_text(provider, settings, content, structured=False)
+            with stage("parse"):
+                sections = parse_completion(text)
+            SUMMARY_PARSE.inc(path="heuristic")
+            return sections
+        with stage("parse"):
+            sections, path = _parse_structured(text)
+            if sections is None:
+                sections, path = parse_completion(text), "heuristic"
+        if path != "heuristic" or all(part.strip() for part in sections) or attempt >= settings.structured_output_max_reasks:
+            SUMMARY_PARSE.inc(path=path)
+            return sections
+        _logger.warning("Unusable structured output from %s, re-asking.", provider)
+        SUMMARY_PARSE.inc(path="reask")
+        attempt += 1
+
+
+async def stream_async(content: str, provider: Optional[str] = None) -> AsyncIterator[str]:
+    """Stream completion text deltas for prebuilt dynamic content under the concurrency limit."""
+    settings = get_settings()
+    provider = provider or _provider_name(settings)
+
+    _require_api_key(provider, settings)
+    async with get_concurrency_limiter().slot(provider, settings):
+        try:
+            client = get_client_registry().get_async(provider, settings)
+            with stage("llm"):
+                if provider == "openrouter":
+                    stream = await client.chat.completions.create(
+                        **_openrouter_request(settings, content),
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                else:
+                    stream = await client.responses.create(**_openai_request(settings, content), stream=True)
+                async for event in stream:
+                    _record_usage(provider, _stream_usage(provider, event))
+                    delta = _stream_delta(provider, event)
+                    if delta:
+                        yield delta
+        except Exception as exc:  # noqa: BLE001
+            LLM_REQUESTS.inc(provider=provider, outcome="error")
+            _logger.warning("LLM stream from %s failed: %r", provider, exc)
+            raise
+    LLM_REQUESTS.inc(provider=provider, outcome="ok")
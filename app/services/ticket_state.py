@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.config import Settings, get_settings
+from app.schemas import Comment, Ticket
+
+
+_logger = logging.getLogger(__name__)
+
+Sections = Tuple[str, str, str]
+
+
+@dataclass
+class TicketState:
+    """Last summary produced for a ticket, the comment prefix it covered and what generated it."""
+    comment_count: int
+    prefix_hash: str
+    sections: Sections
+    # Provider, model and prompt version; a summary made under other settings is not extended.
+    generator: str = ""
+
+
+def prefix_hash(ticket: Ticket, comment_count: int) -> str:
+    """Hash of the description and the first `comment_count` comments."""
+    payload = json.dumps(
+        {
+            "description": ticket.ticket_description.strip(),
+            "comments": [c.model_dump() for c in ticket.comments[:comment_count]],
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def new_comments_since(ticket: Ticket, state: Optional[TicketState], generator: str) -> Optional[List[Comment]]:
+    """Comments appended since `state`, or None when a full summary is required."""
+    if state is None or len(ticket.comments) <= state.comment_count:
+        return None
+    if state.generator != generator:
+        return None
+    if prefix_hash(ticket, state.comment_count) != state.prefix_hash:
+        return None
+    return ticket.comments[state.comment_count:]
+
+
+class TicketStateStore:
+    """Per-ticket summary state, in memory and optionally in SQLite."""
+
+    def __init__(self, settings: Settings) -> None:
+        self._max_entries = settings.summary_cache_max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, TicketState]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if settings.summary_cache_backend.lower() == "sqlite":
+            self._conn = sqlite3.connect(
+                settings.summary_cache_path, timeout=5, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticket_state ("
+                " ticket_number INTEGER PRIMARY KEY, comment_count INTEGER NOT NULL,"
+                " prefix_hash TEXT NOT NULL, sections TEXT NOT NULL, generator TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ticket_state)")}
+            if "generator" not in columns:
+                # Rows from before the generator was tracked never match, so they get a full summary.
+                self._conn.execute("ALTER TABLE ticket_state ADD COLUMN generator TEXT NOT NULL DEFAULT ''")
+
+    def _get(self, ticket_number: int) -> Optional[TicketState]:
+        with self._lock:
+            state = self._entries.get(ticket_number)
+            if state is not None:
+                self._entries.move_to_end(ticket_number)
+                return state
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT comment_count, prefix_hash, sections, generator FROM ticket_state WHERE ticket_number = ?",
+                (ticket_number,),
+            ).fetchone()
+        if row is None:
+            return None
+        problem, resolution, result = json.loads(row[2])
+        return TicketState(row[0], row[1], (problem, resolution, result), row[3])
+
+    def _put(self, ticket_number: int, state: TicketState) -> None:
+        with self._lock:
+            self._entries[ticket_number] = state
+            self._entries.move_to_end(ticket_number)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ticket_state"
+                    " (ticket_number, comment_count, prefix_hash, sections, generator) VALUES (?, ?, ?, ?, ?)",
+                    (ticket_number, state.comment_count, state.prefix_hash,
+                     json.dumps(list(state.sections), ensure_ascii=False), state.generator),
+                )
+
+    async def get(self, ticket_number: int) -> Optional[TicketState]:
+        return await asyncio.to_thread(self._get, ticket_number)
+
+    async def record(self, ticket: Ticket, sections: Sections, generator: str) -> None:
+        """Remember `sections` as covering every comment currently on the ticket."""
+        count = len(ticket.comments)
+        state = TicketState(count, prefix_hash(ticket, count), sections, generator)
+        try:
+            await asyncio.to_thread(self._put, ticket.ticket_number, state)
+        except sqlite3.Error as exc:
+            _logger.warning("Ticket state write failed: %s", exc)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+
+
+_store: Optional[TicketStateStore] = None
+
+
+def get_ticket_state_store() -> TicketStateStore:
+    """Return the process-wide ticket state store."""
+    global _store
+    if _store is None:
+        _store = TicketStateStore(get_settings())
+    return _store
@@ -0,0 +1,223 @@
+"""Local stand-in for the OpenAI `responses` and `chat.completions` APIs.
+
+Usage: python -m bench.fake_llm --port 9000 --latency-median 0.8 --error-rate 0.01 --rate-limit-rate 0.02
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:9000/v1 (or
+OPENROUTER_BASE_URL) and any non-empty API key.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.synthetic import SUMMARY_JSON, SUMMARY_TEXT
+
+
+class FakeConfig:
+    """Behaviour knobs, read from FAKE_LLM_* env vars so uvicorn workers inherit them."""
+
+    def __init__(self) -> None:
+        self.latency_median = float(os.environ.get("FAKE_LLM_LATENCY_MEDIAN", "0.5"))
+        # Log-normal spread; 0 gives a fixed latency.
+        self.latency_sigma = float(os.environ.get("FAKE_LLM_LATENCY_SIGMA", "0.4"))
+        self.error_rate = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+        self.rate_limit_rate = float(os.environ.get("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+        # Fraction of the latency spent before the first streamed token.
+        self.first_token_fraction = float(os.environ.get("FAKE_LLM_FIRST_TOKEN_FRACTION", "0.2"))
+        self.text = os.environ.get("FAKE_LLM_TEXT", SUMMARY_TEXT)
+
+    def latency(self) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency_median
+        return random.lognormvariate(0, self.latency_sigma) * self.latency_median
+
+
+config = FakeConfig()
+app = FastAPI(title="Fake LLM")
+
+
+def _usage_tokens(body: Dict[str, Any]) -> int:
+    return max(1, len(json.dumps(body, ensure_ascii=False).encode("utf-8")) // 4)
+
+
+def _failure() -> Optional[JSONResponse]:
+    """An injected 429/500 response, or None when the request should succeed."""
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached (fake).", "type": "rate_limit_error"}},
+            headers={"retry-after": "1"},
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        return JSONResponse(status_code=500, content={"error": {"message": "Injected failure.", "type": "server_error"}})
+    return None
+
+
+def _text_for(body: Dict[str, Any]) -> str:
+    """JSON output when the caller asked for structured output, Persian headings otherwise."""
+    wants_json = ((body.get("text") or {}).get("format") or {}).get("type") == "json_schema" or (
+        (body.get("response_format") or {}).get("type") == "json_schema"
+    )
+    return SUMMARY_JSON if wants_json else config.text
+
+
+def _chunks(text: str, size: int = 12) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _sse(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _paced(total: float, pieces: List[str]) -> AsyncIterator[str]:
+    await asyncio.sleep(total * config.first_token_fraction)
+    gap = total * (1 - config.first_token_fraction) / max(1, len(pieces))
+    for piece in pieces:
+        yield piece
+        await asyncio.sleep(gap)
+
+
+@app.get("/v1/models")
+async def models() -> Dict[str, Any]:
+    return {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "bench"}]}
+
+
+@app.post("/v1/responses")
+async def responses(request: Request) -> Any:
+    body = await request.json()
+    failure = _failure()
+    latency = config.latency()
+    if failure is not None:
+        await asyncio.sleep(latency * 0.1)
+        return failure
+    response_id = "resp_" + uuid.uuid4().hex
+    text = _text_for(body)
+    usage = {"input_tokens": _usage_tokens(body), "output_tokens": len(text) // 4, "total_tokens": 0}
+    message = {
+        "id": "msg_" + uuid.uuid4().hex,
+        "type": "message",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}],
+    }
+    final = {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": body.get("model", "fake-model"),
+        "output": [message],
+        "usage": usage,
+    }
+
+    if not body.get("stream"):
+        await asyncio.sleep(latency)
+        return final
+
+    async def events() -> AsyncIterator[str]:
+        sequence = 0
+        yield _sse({"type": "response.created", "sequence_number": sequence, "response": {**final, "output": []}})
+        async for piece in _paced(latency, _chunks(text)):
+            sequence += 1
+            yield _sse(
+                {
+                    "type": "response.output_text.delta",
+                    "sequence_number": sequence,
+                    "item_id": message["id"],
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": piece,
+                }
+            )
+        yield _sse({"type": "response.completed", "sequence_number": sequence + 1, "response": final})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Any:
+    body = await request.json()
+    failure = _failure()
+    latency = config.latency()
+    if failure is not None:
+        await asyncio.sleep(latency * 0.1)
+        return failure
+    completion_id = "chatcmpl-" + uuid.uuid4().hex
+    created = int(time.time())
+    model = body.get("model", "fake-model")
+    text = _text_for(body)
+    usage = {
+        "prompt_tokens": _usage_tokens(body),
+        "completion_tokens": len(text) // 4,
+        "total_tokens": 0,
+    }
+
+    if not body.get("stream"):
+        await asyncio.sleep(latency)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+            ],
+            "usage": usage,
+        }
+
+    def chunk(delta: Dict[str, Any], finish: Any = None) -> Dict[str, Any]:
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse(chunk({"role": "assistant", "content": ""}))
+        async for piece in _paced(latency, _chunks(text)):
+            yield _sse(chunk({"content": piece}))
+        yield _sse(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield _sse({**chunk({}), "choices": [], "usage": usage})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the fake LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-median", type=float)
+    parser.add_argument("--latency-sigma", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--rate-limit-rate", type=float)
+    args = parser.parse_args()
+    for flag, env in (
+        ("latency_median", "FAKE_LLM_LATENCY_MEDIAN"),
+        ("latency_sigma", "FAKE_LLM_LATENCY_SIGMA"),
+        ("error_rate", "FAKE_LLM_ERROR_RATE"),
+        ("rate_limit_rate", "FAKE_LLM_RATE_LIMIT_RATE"),
+    ):
+        value = getattr(args, flag)
+        if value is not None:
+            os.environ[env] = str(value)
+    global config
+    config = FakeConfig()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Open-loop load test of app.main:app against the local fake LLM server.
+
+Usage: python -m bench.load --rps 200 --duration 30 [--stream] [--output bench_load.json]
+
+Starts bench.fake_llm and the service under uvicorn as subprocesses (unless
+--app-url points at a running instance), fires requests at a fixed arrival
+rate and reports throughput, latency percentiles and error rates.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.synthetic import make_ticket
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _spawn(module_app: str, port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", module_app,
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url, timeout=1)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def _one(
+    client: httpx.AsyncClient, path: str, payload: Dict[str, Any], stream: bool
+) -> Tuple[str, float, Optional[float]]:
+    """Return (outcome, total latency, time to first byte)."""
+    started = time.perf_counter()
+    first: Optional[float] = None
+    try:
+        if stream:
+            async with client.stream("POST", path, json=payload) as resp:
+                async for _chunk in resp.aiter_raw():
+                    if first is None:
+                        first = time.perf_counter() - started
+                status = str(resp.status_code)
+        else:
+            resp = await client.post(path, json=payload)
+            status = str(resp.status_code)
+    except httpx.TimeoutException:
+        status = "timeout"
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    return status, time.perf_counter() - started, first
+
+
+async def drive(app_url: str, rps: float, duration: float, stream: bool, unique: bool, comments: int) -> Dict[str, Any]:
+    path = "/webhook/ticket/stream" if stream else "/webhook/ticket"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=1000)
+    results: List[Tuple[str, float, Optional[float]]] = []
+    tasks = []
+    async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        sent = 0
+        while True:
+            now = time.perf_counter() - started
+            if now >= duration:
+                break
+            due = int(now * rps) + 1
+            while sent < due:
+                ticket = make_ticket(sent if unique else 1, comments=comments)
+                task = asyncio.create_task(_one(client, path, ticket, stream))
+                task.add_done_callback(lambda t: results.append(t.result()))
+                tasks.append(task)
+                sent += 1
+            await asyncio.sleep(max(0.0, (sent / rps) - (time.perf_counter() - started)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _, _ in results)
+    ok = sorted(latency for status, latency, _ in results if status == "200")
+    ttfb = sorted(first for status, _, first in results if status == "200" and first is not None)
+    return {
+        "sent": sent,
+        "elapsed_seconds": round(elapsed, 3),
+        "target_rps": rps,
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "statuses": dict(statuses),
+        "error_rate": round(1 - len(ok) / max(1, len(results)), 4),
+        "latency_seconds": {f"p{p}": _percentile(ok, p) for p in (50, 95, 99)},
+        "ttfb_seconds": {f"p{p}": _percentile(ttfb, p) for p in (50, 95, 99)} if stream else None,
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    procs: List[subprocess.Popen] = []
+    app_url = args.app_url
+    try:
+        if app_url is None:
+            fake_env = {
+                "FAKE_LLM_LATENCY_MEDIAN": str(args.latency_median),
+                "FAKE_LLM_LATENCY_SIGMA": str(args.latency_sigma),
+                "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+                "FAKE_LLM_RATE_LIMIT_RATE": str(args.rate_limit_rate),
+            }
+            procs.append(_spawn("bench.fake_llm:app", args.fake_port, fake_env))
+            fake_url = f"http://127.0.0.1:{args.fake_port}/v1"
+            app_env = {
+                "OPENAI_API_KEY": "bench",
+                "OPENAI_BASE_URL": fake_url,
+                "OPENROUTER_API_KEY": "bench",
+                "OPENROUTER_BASE_URL": fake_url,
+                "SUMMARY_CACHE_ENABLED": "1" if args.cache else "0",
+                "INCREMENTAL_SUMMARY_ENABLED": "0",
+                "PYTHONUNBUFFERED": "1",
+            }
+            procs.append(_spawn("app.main:app", args.app_port, app_env, args.workers))
+            app_url = f"http://127.0.0.1:{args.app_port}"
+            await _wait_ready(f"http://127.0.0.1:{args.fake_port}/v1/models")
+            await _wait_ready(f"{app_url}/healthz")
+
+        report = await drive(app_url, args.rps, args.duration, args.stream, not args.repeat, args.comments)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the webhook against a fake LLM.")
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--stream", action="store_true", help="use POST /webhook/ticket/stream")
+    parser.add_argument("--repeat", action="store_true", help="send the same ticket every time (cache hits)")
+    parser.add_argument("--cache", action="store_true", help="leave the summary cache enabled")
+    parser.add_argument("--comments", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--app-url", default=None, help="target a running instance instead of spawning one")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--latency-median", type=float, default=0.5)
+    parser.add_argument("--latency-sigma", type=float, default=0.4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="bench_load.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(json.dumps({k: report[k] for k in ("throughput_rps", "statuses", "error_rate", "latency_seconds")}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Micro-benchmarks for prompt building and section parsing over large synthetic tickets.
+
+Usage: python -m bench.micro [--output bench_micro.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Any, Callable, Dict
+
+from app.schemas import Ticket
+from app.services.prompt import build_ticket_json, estimate_tokens
+from app.services.summarizer import SectionStreamParser, _build_input, _parse_three_sections
+from bench.synthetic import SUMMARY_TEXT, make_ticket
+
+_CASES = {
+    "small": {"comments": 5},
+    "large": {"comments": 200, "attachments": 20},
+    "huge_logs": {"comments": 50, "log_lines": 20000, "attachments": 10},
+}
+
+
+def _time(fn: Callable[[], Any], min_seconds: float = 0.5) -> Dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = timer.repeat(repeat=5, number=number)
+    per_call = [r / number for r in runs]
+    if sum(runs) < min_seconds:
+        per_call += [r / number for r in timer.repeat(repeat=5, number=number)]
+    per_call.sort()
+    return {"best_us": per_call[0] * 1e6, "median_us": per_call[len(per_call) // 2] * 1e6, "loops": number}
+
+
+def _stream_parse(text: str) -> None:
+    parser = SectionStreamParser()
+    for i in range(0, len(text), 12):
+        parser.feed(text[i:i + 12])
+    parser.flush()
+    parser.sections()
+
+
+def run() -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, shape in _CASES.items():
+        payload = make_ticket(1000, seed=1, **shape)
+        ticket = Ticket.model_validate(payload)
+        pretty = json.dumps(ticket.model_dump(), ensure_ascii=False, indent=2)
+        compact = build_ticket_json(ticket)
+        results[name] = {
+            "input_tokens_pretty": estimate_tokens(pretty),
+            "input_tokens_compacted": estimate_tokens(compact),
+            "serialize_pretty": _time(lambda: json.dumps(ticket.model_dump(), ensure_ascii=False, indent=2)),
+            "build_input": _time(lambda: _build_input(pretty)),
+            "build_ticket_json": _time(lambda: build_ticket_json(ticket)),
+        }
+
+    long_text = "\n".join([SUMMARY_TEXT] * 20)
+    results["parse"] = {
+        "parse_three_sections": _time(lambda: _parse_three_sections(SUMMARY_TEXT)),
+        "parse_three_sections_long": _time(lambda: _parse_three_sections(long_text)),
+        "stream_parser": _time(lambda: _stream_parse(SUMMARY_TEXT)),
+    }
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "results": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run prompt/parse micro-benchmarks.")
+    parser.add_argument("--output", default="bench_micro.json")
+    args = parser.parse_args()
+    # Compaction logs one line per call; keep the benchmark output readable.
+    import logging
+
+    logging.getLogger("app.services.prompt").setLevel(logging.WARNING)
+    report = run()
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    for case, metrics in report["results"].items():
+        for metric, value in metrics.items():
+            shown = f"{value['median_us']:.1f} us" if isinstance(value, dict) else value
+            print(f"{case:>10} {metric:<28} {shown}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import random
+from typing import Any, Dict, List, Optional
+
+_SUPPORT = ["مهدی اکبری", "مهرشاد دهقانی", "فاطمه حمدی", "پارسا حاجی قاسمی"]
+_SENTENCES = [
+    "مشتری گزارش داد که سرویس دیتابیس پس از ری‌استارت در دسترس نیست.",
+    "لاگ‌های سرور بررسی شد و خطای connection refused مشاهده شد.",
+    "پیکربندی firewall به‌روزرسانی شد و پورت 5432 باز شد.",
+    "بعد از اعمال تغییرات، اتصال برقرار شد و مشتری تایید کرد.",
+    "درخواست افزایش منابع CPU و RAM برای سرور ثبت شد.",
+    "backup روزانه بررسی شد و مشکلی در آن وجود نداشت.",
+]
+_LOG_LINE = "2024-05-01T12:00:{:02d}Z ERROR db-proxy connection refused upstream=10.0.0.{} retry={}\n"
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(rng.choice(_SENTENCES) for _ in range(sentences))
+
+
+def make_ticket(
+    ticket_number: int,
+    comments: int = 10,
+    log_lines: int = 0,
+    attachments: int = 0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """A ticket payload shaped like real webhook deliveries, optionally with pasted logs."""
+    rng = random.Random(seed if seed is not None else ticket_number)
+    items: List[Dict[str, Any]] = []
+    for index in range(comments):
+        if index % 2 == 0:
+            items.append({"sender": "customer", "type": "text", "content": _paragraph(rng, rng.randint(1, 4))})
+        else:
+            items.append(
+                {
+                    "sender": "technical_support",
+                    "name": rng.choice(_SUPPORT),
+                    "type": "text",
+                    "visibility": rng.choice(["internal", "public"]),
+                    "content": _paragraph(rng, rng.randint(1, 4)),
+                }
+            )
+    if log_lines:
+        log = "".join(_LOG_LINE.format(i % 60, i % 255, i % 5) for i in range(log_lines))
+        items.insert(1, {"sender": "customer", "type": "text", "content": "لاگ سرویس:\n" + log})
+    for index in range(attachments):
+        items.append(
+            {
+                "sender": "customer",
+                "type": "attachment",
+                "content": f"https://files.example.com/tickets/{ticket_number}/screenshot-{index}.png",
+            }
+        )
+    return {
+        "ticket_number": ticket_number,
+        "ticket_title": "قطعی اتصال به دیتابیس",
+        "ticket_priority": rng.choice(["normal", "high", "critical"]),
+        "ticket_labels": ["database", "postgres"],
+        "ticket_status": rng.choice(["open", "resolved", "closed"]),
+        "ticket_description": _paragraph(rng, 3),
+        "comments": items,
+    }
+
+
+SUMMARY_TEXT = (
+    "1. مسئله:\n"
+    "مشتری پس از ری‌استارت سرور به دیتابیس دسترسی نداشت و خطای connection refused دریافت می‌کرد.\n\n"
+    "2. روند حل به‌صورت خلاصه:\n"
+    "مهدی اکبری لاگ‌ها را بررسی کرد و مشخص شد پورت 5432 در firewall بسته است. "
+    "فاطمه حمدی پیکربندی را اصلاح کرد.\n\n"
+    "3. نتیجه و نکات کلیدی:\n"
+    "اتصال برقرار شد و مشتری تایید کرد. توصیه شد پس از تغییرات شبکه قوانین firewall بازبینی شوند."
+)
+
+SUMMARY_JSON = (
+    '{"problem": "مشتری پس از ری‌استارت سرور به دیتابیس دسترسی نداشت.", '
+    '"resolution_summary": "مهدی اکبری لاگ‌ها را بررسی کرد و فاطمه حمدی پیکربندی firewall را اصلاح کرد.", '
+    '"result_and_key_points": "اتصال برقرار شد و مشتری تایید کرد."}'
+)
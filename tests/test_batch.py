@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+
+from app import batch as cli
+from app.services import batch
+from app.services.concurrency import LLMBusyError
+from bench.synthetic import make_ticket
+
+
+SECTIONS = ("1. a", "2. b", "3. c")
+
+
+def _run(items):
+    async def collect():
+        async def source():
+            for pair in enumerate(items):
+                yield pair
+
+        return [record async for record in batch.run_batch(source(), concurrency=2)]
+
+    return asyncio.run(collect())
+
+
+def test_items_are_charged_once_and_only_on_cache_miss(monkeypatch):
+    charges = []
+    attempts = {}
+
+    async def acquire(provider, tokens, settings):
+        charges.append(tokens)
+
+    async def summarize(ticket, before_llm=None):
+        if ticket.ticket_number == 1:
+            return SECTIONS, "cached"
+        attempts[ticket.ticket_number] = attempts.get(ticket.ticket_number, 0) + 1
+        await before_llm("x" * 400)
+        if attempts[ticket.ticket_number] < 3:
+            raise LLMBusyError("openai", 0)
+        return SECTIONS, "full"
+
+    monkeypatch.setattr(batch._limits, "acquire", acquire)
+    monkeypatch.setattr(batch, "summarize", summarize)
+
+    records = _run([make_ticket(1), make_ticket(2)])
+
+    assert sorted(r["status"] for r in records) == ["ok", "ok"]
+    assert attempts == {2: 3}
+    assert charges == [100 + batch.MAX_OUTPUT_TOKENS]
+
+
+def test_resume_keys_on_input_line_and_keeps_line_indexes(monkeypatch, tmp_path, capsys):
+    calls = []
+
+    async def summarize(ticket, before_llm=None):
+        calls.append(ticket.ticket_number)
+        return SECTIONS, "full"
+
+    monkeypatch.setattr(batch, "summarize", summarize)
+    first, revised = make_ticket(7), make_ticket(7, comments=12)
+    source = tmp_path / "in.jsonl"
+    source.write_text("\n".join(json.dumps(t) for t in (first, make_ticket(8), revised)) + "\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    # A previous run finished line 0 and failed line 1.
+    output.write_text(
+        json.dumps({"index": 0, "ticket_number": 7, "status": "ok", "result": {}}) + "\n"
+        + json.dumps({"index": 1, "ticket_number": 8, "status": "error", "error": "boom"}) + "\n",
+        encoding="utf-8",
+    )
+
+    assert asyncio.run(cli._run(argparse.Namespace(input=str(source), output=str(output), concurrency=2))) == 0
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()][2:]
+    assert sorted(calls) == [7, 8]
+    assert "skipped 1 already summarized" in capsys.readouterr().err
+    assert sorted((r["index"], r["ticket_number"]) for r in records) == [(1, 8), (2, 7)]
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.config import Settings
+from app.schemas import Ticket
+from app.services.cache import SummaryCache, summary_cache_key
+from app.services.summarizer import prompt_version
+from bench.synthetic import make_ticket
+
+
+SECTIONS = ("1. problem", "2. resolution", "3. result")
+
+
+def _cache() -> SummaryCache:
+    return SummaryCache(Settings(summary_cache_backend="memory"))
+
+
+def test_coalesced_waiters_share_one_computation():
+    async def scenario():
+        cache = _cache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return SECTIONS
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [SECTIONS] * 5
+    assert cache.stats.coalesced == 4
+
+
+def test_waiter_takes_over_when_leader_is_cancelled():
+    async def scenario():
+        cache = _cache()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return SECTIONS
+
+        async def fast():
+            return SECTIONS
+
+        leader = asyncio.create_task(cache.get_or_compute("k", slow))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_compute("k", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        return cache, leader, follower, result
+
+    cache, leader, follower, result = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert not follower.cancelled()
+    assert result == SECTIONS
+    assert cache.snapshot()["in_flight"] == 0
+
+
+def test_leader_failure_propagates_to_waiters():
+    async def scenario():
+        cache = _cache()
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        return await asyncio.gather(
+            cache.get_or_compute("k", broken), cache.get_or_compute("k", broken), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_structured_mode_changes_the_cache_key():
+    ticket = Ticket.model_validate(make_ticket(1))
+    plain = summary_cache_key(ticket, "openai", "m", prompt_version(False))
+    structured = summary_cache_key(ticket, "openai", "m", prompt_version(True))
+
+    assert plain != structured
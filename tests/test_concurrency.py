@@ -0,0 +1,23 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+import pytest
+
+from app.config import Settings
+from app.services.concurrency import ConcurrencyLimiter, LLMBusyError
+
+
+@pytest.mark.parametrize("max_concurrency", [0, 256])
+def test_limit_never_exceeds_the_connection_pool(max_concurrency):
+    settings = Settings(llm_max_connections=2, llm_max_concurrency=max_concurrency, llm_acquire_timeout_seconds=0)
+
+    async def scenario():
+        limiter = ConcurrencyLimiter()
+        async with AsyncExitStack() as stack:
+            for _ in range(2):
+                await stack.enter_async_context(limiter.slot("openai", settings))
+            with pytest.raises(LLMBusyError):
+                async with limiter.slot("openai", settings):
+                    pass
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from app.config import Settings
+from app.services.health import ProviderProbe
+
+
+def test_warm_up_reprobes_instead_of_reusing_cached_failure(monkeypatch):
+    settings = Settings(llm_provider="openai", openai_api_key="k", llm_providers="", health_deep_cache_seconds=30)
+    calls = []
+
+    async def probe(self, provider, probe_settings, timeout):
+        calls.append(timeout)
+        return "ok" if len(calls) > 1 else "failed: APIConnectionError"
+
+    monkeypatch.setattr(ProviderProbe, "_probe", probe)
+
+    async def scenario():
+        probe_ = ProviderProbe()
+        # Populate the deep-check cache with a failure first.
+        assert await probe_.check(settings) == {"openai": "failed: APIConnectionError"}
+        calls.clear()
+        started = time.monotonic()
+        probe_.start_warm_up(settings)
+        while not probe_.warm:
+            await asyncio.sleep(0.05)
+            assert time.monotonic() - started < 5
+        # Successful warm-up refreshes the cached deep-check result.
+        return probe_, await probe_.check(settings)
+
+    probe_, cached = asyncio.run(scenario())
+    assert probe_.warm
+    assert calls == [settings.warmup_timeout_seconds] * 2
+    assert cached == {"openai": "ok"}
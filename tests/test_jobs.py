@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+
+from app.config import Settings
+from app.schemas import Ticket
+from app.services import jobs
+from app.services.jobs import QUEUED, JobStore, JobWorkerPool, callback_allowed
+from bench.synthetic import make_ticket
+
+
+def _settings(**overrides) -> Settings:
+    return Settings(job_workers=1, job_poll_interval_seconds=0.01, **overrides)
+
+
+def test_callback_allowlist_matches_scheme_host_and_path_prefix():
+    settings = _settings(job_callback_allowed_urls="https://hooks.example.com/summaries")
+
+    assert callback_allowed("https://hooks.example.com/summaries/42", settings)
+    assert not callback_allowed("https://hooks.example.com.evil.test/summaries", settings)
+    assert not callback_allowed("http://hooks.example.com/summaries", settings)
+    assert not callback_allowed("http://169.254.169.254/latest/meta-data", settings)
+    assert not callback_allowed("https://hooks.example.com/summaries", _settings())
+
+
+def test_shutdown_requeues_the_running_job(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=300)
+    job_id = store.enqueue(Ticket.model_validate(make_ticket(1)), None)
+    started = asyncio.Event()
+
+    async def hang(ticket):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(jobs, "summarize", hang)
+
+    async def scenario():
+        pool = JobWorkerPool(store, _settings())
+        pool.start()
+        await asyncio.wait_for(started.wait(), timeout=5)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert store.get(job_id)["status"] == QUEUED
+    assert store.claim()["id"] == job_id
+
+
+def test_worker_survives_store_errors(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=300)
+    claim = store.claim
+    failures = []
+
+    def flaky_claim():
+        if len(failures) < 2:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return claim()
+
+    monkeypatch.setattr(store, "claim", flaky_claim)
+
+    async def summarize(ticket):
+        return ("1. a", "2. b", "3. c"), "full"
+
+    monkeypatch.setattr(jobs, "summarize", summarize)
+    job_id = store.enqueue(Ticket.model_validate(make_ticket(2)), None)
+
+    async def scenario():
+        pool = JobWorkerPool(store, _settings())
+        pool.start()
+        for _ in range(200):
+            if store.get(job_id)["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert len(failures) == 2
+    assert store.get(job_id)["status"] == "done"
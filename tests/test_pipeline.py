@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app import config
+from app.config import Settings
+from app.schemas import Ticket
+from app.services import cache, pipeline
+from app.services.metrics import SUMMARY_PARSE
+from bench.synthetic import SUMMARY_TEXT, make_ticket
+
+
+STRUCTURED = ("problem", "resolution", "result")
+
+
+class _FakeRouter:
+    def __init__(self) -> None:
+        self.completions = 0
+
+    async def complete(self, content):
+        self.completions += 1
+        return STRUCTURED
+
+    async def stream(self, content):
+        for start in range(0, len(SUMMARY_TEXT), 17):
+            yield SUMMARY_TEXT[start:start + 17]
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(
+        config,
+        "_settings",
+        Settings(
+            openai_api_key="k",
+            summary_cache_enabled=True,
+            summary_cache_backend="memory",
+            structured_output_enabled=True,
+            incremental_summary_enabled=False,
+            scheduler_max_concurrency=0,
+            scheduler_provider_tokens_per_minute=0,
+        ),
+    )
+    monkeypatch.setattr(cache, "_cache", None)
+    fake = _FakeRouter()
+    monkeypatch.setattr(pipeline, "get_router", lambda: fake)
+    return fake
+
+
+def test_streamed_plain_summary_is_not_served_to_structured_mode(router):
+    ticket = Ticket.model_validate(make_ticket(1))
+
+    streamed_before = SUMMARY_PARSE._values.get(("stream",), 0)
+
+    async def scenario():
+        events = [event async for event in pipeline.summarize_stream(ticket)]
+        sections, mode = await pipeline.summarize(ticket)
+        restreamed = [event async for event in pipeline.summarize_stream(ticket)]
+        return events, sections, mode, restreamed
+
+    events, sections, mode, restreamed = asyncio.run(scenario())
+    assert events[-1][1]["summary_mode"] == "full"
+    assert (sections, mode) == (STRUCTURED, "full")
+    assert router.completions == 1
+    assert SUMMARY_PARSE._values.get(("stream",), 0) == streamed_before + 1
+    # The stream still reuses its own plain-mode entry.
+    assert restreamed[-1][1]["summary_mode"] == "cached"
@@ -0,0 +1,36 @@
+import logging
+
+from app.config import Settings
+from app.schemas import Ticket
+from app.services.prompt import build_incremental_json, build_ticket_json, estimate_tokens
+from bench.synthetic import make_ticket
+
+
+def test_many_comments_are_elided_to_fit_the_budget():
+    settings = Settings(prompt_token_budget=6000, prompt_max_comment_chars=2000)
+    ticket = Ticket.model_validate(make_ticket(1, comments=200, seed=1))
+
+    compacted = build_ticket_json(ticket, settings)
+
+    assert estimate_tokens(compacted) <= settings.prompt_token_budget
+    assert "comments omitted]" in compacted
+    # The opening and the latest comment survive elision.
+    assert ticket.comments[-1].content[:40] in compacted
+
+
+def test_small_ticket_is_not_elided():
+    settings = Settings(prompt_token_budget=6000)
+    ticket = Ticket.model_validate(make_ticket(2, comments=5, seed=2))
+
+    assert "comments omitted]" not in build_ticket_json(ticket, settings)
+
+
+def test_warns_when_budget_cannot_be_met(caplog):
+    settings = Settings(prompt_token_budget=50)
+    ticket = Ticket.model_validate(make_ticket(3, comments=20, seed=3))
+
+    with caplog.at_level(logging.WARNING, logger="app.services.prompt"):
+        _meta, compacted = build_incremental_json(ticket, ticket.comments, settings)
+
+    assert estimate_tokens(compacted) > settings.prompt_token_budget
+    assert "over the 50-token budget" in caplog.text
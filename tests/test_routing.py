@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from app import config
+from app.config import Settings
+from app.services import routing
+from app.services.routing import Router
+
+
+_REQUEST = httpx.Request("POST", "https://llm.test/v1/responses")
+SECTIONS = ("1. a", "2. b", "3. c")
+
+
+def test_client_errors_do_not_open_the_breaker():
+    settings = Settings(llm_breaker_failure_threshold=3)
+    router = Router()
+    too_long = openai.BadRequestError(
+        "context length exceeded", response=httpx.Response(400, request=_REQUEST), body=None
+    )
+
+    for _ in range(10):
+        router.record_failure("openai", too_long, settings)
+
+    assert router.health("openai").state == "closed"
+    assert router.health("openai").consecutive_failures == 0
+
+
+def test_transient_errors_open_the_breaker():
+    settings = Settings(llm_breaker_failure_threshold=3)
+    router = Router()
+
+    for _ in range(3):
+        router.record_failure("openai", openai.APITimeoutError(request=_REQUEST), settings)
+
+    assert router.health("openai").state == "open"
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        llm_provider="openai",
+        openai_api_key="k",
+        openrouter_api_key="k",
+        llm_providers="openrouter",
+        llm_max_retries=2,
+        llm_retry_backoff_seconds=0,
+        llm_hedge_enabled=False,
+        llm_deadline_seconds=5,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def test_timeout_fails_over_without_retrying_the_same_provider(monkeypatch):
+    monkeypatch.setattr(config, "_settings", _settings())
+    calls = []
+
+    async def complete(content, provider=None):
+        calls.append(provider)
+        if provider == "openai":
+            raise openai.APITimeoutError(request=_REQUEST)
+        return SECTIONS
+
+    monkeypatch.setattr(routing, "complete_async", complete)
+
+    assert asyncio.run(Router().complete("content")) == SECTIONS
+    assert calls == ["openai", "openrouter"]
+
+
+def test_transient_server_errors_are_retried_on_the_same_provider(monkeypatch):
+    monkeypatch.setattr(config, "_settings", _settings())
+    calls = []
+
+    async def complete(content, provider=None):
+        calls.append(provider)
+        if len(calls) == 1:
+            raise openai.InternalServerError("boom", response=httpx.Response(500, request=_REQUEST), body=None)
+        return SECTIONS
+
+    monkeypatch.setattr(routing, "complete_async", complete)
+
+    assert asyncio.run(Router().complete("content")) == SECTIONS
+    assert calls == ["openai", "openai"]
+
+
+def test_overall_deadline_bounds_the_call(monkeypatch):
+    monkeypatch.setattr(config, "_settings", _settings(llm_deadline_seconds=0.1))
+
+    async def hang(content, provider=None):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(routing, "complete_async", hang)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(Router().complete("content"))
+    assert time.monotonic() - started < 2
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+
+from app import config
+from app.config import Settings
+from app.schemas import Ticket
+from app.services.scheduler import LLMScheduler, LLMShedError, ticket_rank
+from bench.synthetic import make_ticket
+
+
+def _ticket(priority: str = "normal", status: str = "open", labels=None) -> Ticket:
+    ticket = Ticket.model_validate(make_ticket(1))
+    ticket.ticket_priority = priority
+    ticket.ticket_status = status
+    if labels is not None:
+        ticket.ticket_labels = labels
+    return ticket
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    current = Settings(
+        scheduler_max_concurrency=0,
+        scheduler_provider_tokens_per_minute=0,
+        scheduler_label_tokens_per_minute=0,
+        scheduler_label_limits="",
+        scheduler_shed_priorities="normal",
+        scheduler_max_wait_seconds=5,
+        llm_busy_retry_after_seconds=1,
+    )
+    monkeypatch.setattr(config, "_settings", current)
+    return current
+
+
+def test_rank_uses_repo_priority_and_status_vocabulary():
+    assert ticket_rank(_ticket("critical")) < ticket_rank(_ticket("high")) < ticket_rank(_ticket("normal"))
+    assert ticket_rank(_ticket("normal", "samurai workflow")) == ticket_rank(_ticket("normal", "open"))
+    assert ticket_rank(_ticket("normal", "open")) < ticket_rank(_ticket("normal", "closed"))
+    assert ticket_rank(_ticket("high", "closed")) < ticket_rank(_ticket("normal", "open"))
+
+
+def test_waiters_are_admitted_by_priority_then_status(settings):
+    settings.scheduler_max_concurrency = 1
+    order = []
+
+    async def scenario():
+        scheduler = LLMScheduler()
+        release = asyncio.Event()
+
+        async def run(priority, status="open"):
+            async with scheduler.slot(_ticket(priority, status), "x", "openai"):
+                order.append((priority, status))
+                await release.wait()
+
+        first = asyncio.create_task(run("normal"))
+        await asyncio.sleep(0)
+        others = [
+            asyncio.create_task(run(p, s))
+            for p, s in [("normal", "closed"), ("normal", "open"), ("high", "open"), ("critical", "closed")]
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.depth() == {"normal": 2, "high": 1, "critical": 1}
+        release.set()
+        await asyncio.gather(first, *others)
+
+    asyncio.run(scenario())
+    assert order == [
+        ("normal", "open"),
+        ("critical", "closed"),
+        ("high", "open"),
+        ("normal", "open"),
+        ("normal", "closed"),
+    ]
+
+
+def test_exhausted_budget_sheds_normal_and_queues_high(settings):
+    # Each call costs the prompt estimate plus 600 output tokens; the bucket holds one call.
+    settings.scheduler_provider_tokens_per_minute = 700
+    settings.scheduler_max_wait_seconds = 0.05
+
+    async def scenario():
+        scheduler = LLMScheduler()
+        async with scheduler.slot(_ticket("critical"), "x", "openai"):
+            pass
+        with pytest.raises(LLMShedError) as shed:
+            async with scheduler.slot(_ticket("normal"), "x", "openai"):
+                pass
+        assert shed.value.reason == "budget"
+        assert shed.value.retry_after_seconds > 1
+        with pytest.raises(LLMShedError) as timed_out:
+            async with scheduler.slot(_ticket("high"), "x", "openai"):
+                pass
+        assert timed_out.value.reason == "timeout"
+        assert scheduler.depth() == {}
+
+    asyncio.run(scenario())
+
+
+def test_label_budget_only_holds_back_its_own_label(settings):
+    settings.scheduler_label_limits = "noisy=700"
+    settings.scheduler_shed_priorities = ""
+    order = []
+
+    async def scenario():
+        scheduler = LLMScheduler()
+
+        async def run(label):
+            async with scheduler.slot(_ticket("high", labels=[label]), "x", "openai"):
+                order.append(label)
+
+        await run("noisy")
+        waiting = asyncio.create_task(run("noisy"))
+        await asyncio.sleep(0)
+        await run("quiet")
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.depth() == {}
+
+    asyncio.run(scenario())
+    assert order == ["noisy", "quiet"]
+
+
+def test_abandon_releases_a_slot_admitted_as_the_caller_gives_up(settings):
+    settings.scheduler_max_concurrency = 1
+
+    async def scenario():
+        scheduler = LLMScheduler()
+        holder = scheduler.slot(_ticket("high"), "x", "openai")
+        await holder.__aenter__()
+        waiter = asyncio.create_task(_enter_and_exit(scheduler))
+        await asyncio.sleep(0)
+        # Release the holder, which admits the waiter, then cancel the waiter before it resumes.
+        await holder.__aexit__(None, None, None)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler._running == 0
+        async with scheduler.slot(_ticket("normal"), "x", "openai"):
+            assert scheduler._running == 1
+
+    asyncio.run(scenario())
+
+
+async def _enter_and_exit(scheduler: LLMScheduler) -> None:
+    async with scheduler.slot(_ticket("high"), "x", "openai"):
+        pass
+
+
+def test_default_cap_is_the_llm_concurrency_limit(settings):
+    settings.llm_max_concurrency = 1
+    order = []
+
+    async def scenario():
+        scheduler = LLMScheduler()
+        release = asyncio.Event()
+
+        async def run(priority):
+            async with scheduler.slot(_ticket(priority), "x", "openai"):
+                order.append(priority)
+                await release.wait()
+
+        first = asyncio.create_task(run("normal"))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(run(p)) for p in ("normal", "critical")]
+        await asyncio.sleep(0)
+        assert order == ["normal"]
+        assert scheduler.depth() == {"normal": 1, "critical": 1}
+        release.set()
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(scenario())
+    assert order == ["normal", "critical", "normal"]
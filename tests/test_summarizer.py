@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app import config
+from app.config import Settings
+from app.services import summarizer
+from bench.synthetic import SUMMARY_TEXT
+
+
+_REQUEST = httpx.Request("POST", "https://llm.test/v1/chat/completions")
+
+
+def test_structured_request_rejected_by_model_falls_back_to_plain_text(monkeypatch):
+    monkeypatch.setattr(
+        config, "_settings", Settings(llm_provider="openrouter", openrouter_api_key="k", structured_output_enabled=True)
+    )
+    calls = []
+
+    async def request_text(provider, settings, content, structured):
+        calls.append(structured)
+        if structured:
+            raise openai.BadRequestError(
+                "response_format json_schema is not supported",
+                response=httpx.Response(400, request=_REQUEST),
+                body=None,
+            )
+        return SUMMARY_TEXT
+
+    monkeypatch.setattr(summarizer, "_request_text", request_text)
+
+    sections = asyncio.run(summarizer.complete_async("content"))
+
+    assert calls == [True, False]
+    assert all(part.strip() for part in sections)
+    assert summarizer.parse_completion(SUMMARY_TEXT) == sections
+
+
+def test_plain_fallback_errors_still_propagate(monkeypatch):
+    monkeypatch.setattr(config, "_settings", Settings(openai_api_key="k", structured_output_enabled=True))
+
+    async def request_text(provider, settings, content, structured):
+        raise openai.BadRequestError(
+            "context length exceeded", response=httpx.Response(400, request=_REQUEST), body=None
+        )
+
+    monkeypatch.setattr(summarizer, "_request_text", request_text)
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(summarizer.complete_async("content"))
+
+
+def _stream(deltas):
+    parser = summarizer.SectionStreamParser()
+    chunks = [chunk for delta in deltas for chunk in parser.feed(delta)]
+    return chunks, parser.flush(), parser.sections()
+
+
+def test_stream_parser_handles_headings_split_across_deltas():
+    deltas = [SUMMARY_TEXT[i:i + 3] for i in range(0, len(SUMMARY_TEXT), 3)]
+
+    chunks, tail, sections = _stream(deltas)
+
+    assert sections == summarizer._parse_three_sections(SUMMARY_TEXT)
+    assert [field for field, _ in chunks + tail if _.strip()][0] == "problem"
+    assert "".join(text for _, text in chunks + tail) == SUMMARY_TEXT
+
+
+def test_stream_parser_holds_a_partial_line_only_until_it_can_be_classified():
+    parser = summarizer.SectionStreamParser()
+    assert parser.feed("1. مسئله:\nمشتری") == [("problem", "1. مسئله:\n")]
+    # A short partial line could still be a heading, so it is held back.
+    assert parser.feed("\n2. روند") == [("problem", "مشتری\n")]
+    assert parser.feed(" حل") == []
+    long_line = " به‌صورت خلاصه و با جزئیات کافی"
+    assert parser.feed(long_line) == [("resolution_summary", "2. روند حل" + long_line)]
+    assert parser.feed(" ادامه") == [("resolution_summary", " ادامه")]
+
+
+def test_stream_parser_accepts_headings_without_digits():
+    text = "مسئله: دیتابیس در دسترس نبود.\nروند حل: پورت باز شد.\nنتیجه: اتصال برقرار شد."
+
+    chunks, tail, sections = _stream(list(text))
+
+    assert sections == summarizer._parse_three_sections(text)
+    assert [field for field, _ in chunks + tail] == list(summarizer.SECTION_FIELDS)
+
+
+def test_stream_parser_agrees_with_batch_parser():
+    texts = [
+        SUMMARY_TEXT,
+        SUMMARY_TEXT.replace("1. ", "**1. ").replace("2. ", "**2. ").replace("3. ", "**3. "),
+        "1) مسئله\nخطا\n2) روند\n1. بررسی لاگ\n2. اصلاح\n3) نتیجه\nحل شد",
+    ]
+    for text in texts:
+        for size in (1, 7, len(text)):
+            _, _, sections = _stream([text[i:i + size] for i in range(0, len(text), size)])
+            assert sections == summarizer._parse_three_sections(text), (text, size)
@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+
+from app.config import Settings
+from app.schemas import Comment, Ticket
+from app.services.ticket_state import TicketStateStore, new_comments_since
+from bench.synthetic import make_ticket
+
+
+SECTIONS = ("1. problem", "2. resolution", "3. result")
+GENERATOR = "openai:gpt-4.1:abc123"
+
+
+def _recorded(tmp_path, ticket: Ticket, generator: str = GENERATOR):
+    store = TicketStateStore(
+        Settings(summary_cache_backend="sqlite", summary_cache_path=str(tmp_path / "state.sqlite3"))
+    )
+    asyncio.run(store.record(ticket, SECTIONS, generator))
+    # A fresh store reads the row back from SQLite rather than memory.
+    store.close()
+    reopened = TicketStateStore(
+        Settings(summary_cache_backend="sqlite", summary_cache_path=str(tmp_path / "state.sqlite3"))
+    )
+    return asyncio.run(reopened.get(ticket.ticket_number))
+
+
+def _with_comment(ticket: Ticket, text: str) -> Ticket:
+    updated = ticket.model_copy(deep=True)
+    updated.comments.append(Comment(sender="support", type="message", content=text))
+    return updated
+
+
+def test_appended_comments_are_returned(tmp_path):
+    ticket = Ticket.model_validate(make_ticket(1, comments=4, seed=1))
+    state = _recorded(tmp_path, ticket)
+
+    updated = _with_comment(_with_comment(ticket, "first follow-up"), "second follow-up")
+
+    assert state.sections == SECTIONS
+    assert [c.content for c in new_comments_since(updated, state, GENERATOR)] == [
+        "first follow-up",
+        "second follow-up",
+    ]
+
+
+def test_edited_earlier_comment_requires_full_summary(tmp_path):
+    ticket = Ticket.model_validate(make_ticket(2, comments=4, seed=2))
+    state = _recorded(tmp_path, ticket)
+
+    updated = _with_comment(ticket, "follow-up")
+    updated.comments[1].content = "edited"
+
+    assert new_comments_since(updated, state, GENERATOR) is None
+
+
+def test_unchanged_ticket_requires_full_summary(tmp_path):
+    ticket = Ticket.model_validate(make_ticket(3, comments=4, seed=3))
+    state = _recorded(tmp_path, ticket)
+
+    assert new_comments_since(ticket, state, GENERATOR) is None
+
+
+def test_different_generator_requires_full_summary(tmp_path):
+    ticket = Ticket.model_validate(make_ticket(4, comments=4, seed=4))
+    state = _recorded(tmp_path, ticket)
+    updated = _with_comment(ticket, "follow-up")
+
+    assert new_comments_since(updated, state, "openai:gpt-4.1:def456") is None
+    assert new_comments_since(updated, state, "openrouter:other-model:abc123") is None
+
+
+def test_rows_from_before_generator_tracking_get_full_summary(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE ticket_state (ticket_number INTEGER PRIMARY KEY, comment_count INTEGER NOT NULL,"
+        " prefix_hash TEXT NOT NULL, sections TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO ticket_state VALUES (5, 1, 'x', '[\"a\", \"b\", \"c\"]')")
+    conn.commit()
+    conn.close()
+
+    store = TicketStateStore(Settings(summary_cache_backend="sqlite", summary_cache_path=str(path)))
+    state = asyncio.run(store.get(5))
+
+    assert state.generator == ""
+    ticket = Ticket.model_validate(make_ticket(5, comments=3, seed=5))
+    assert new_comments_since(ticket, state, GENERATOR) is None